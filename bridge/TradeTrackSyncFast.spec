@@ -0,0 +1,54 @@
+# -*- mode: python ; coding: utf-8 -*-
+import os
+
+# Варіант збірки під швидкий холодний старт (запуски з Планувальника завдань: --sync-only, --export):
+# папка замість одного exe — onefile на кожному запуску розпаковує все у %TEMP%, тут файли вже на диску;
+# без UPX — DLL не розпаковуються при завантаженні; модулі, яких bridge не імпортує, не збираються.
+# Запускати з папки bridge: cd bridge; pyinstaller TradeTrackSyncFast.spec
+# Результат: dist\TradeTrackSync\TradeTrackSync.exe (розповсюджується вся папка)
+SPEC_DIR = os.getcwd()
+ICON_PATH = os.path.join(SPEC_DIR, 'icon.ico')
+
+a = Analysis(
+    ['main.py'],
+    pathex=[SPEC_DIR],
+    binaries=[],
+    datas=[(ICON_PATH, '.')],
+    hiddenimports=['numpy', 'MetaTrader5'],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['pytz', 'pydoc', 'doctest', 'lib2to3', 'xmlrpc', 'pdb', 'tkinter.test', 'idlelib'],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='TradeTrackSync',
+    icon=ICON_PATH,
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='TradeTrackSync',
+)
@@ -0,0 +1,223 @@
+"""
+Кілька рахунків в одному bridge: API MetaTrader5 — один термінал на процес, тому кожен термінал (mt5_path)
+отримує окремий процес-воркер. Синки різних терміналів ідуть паралельно, рахунки одного терміналу — по черзі.
+З одним рахунком у config.json синк виконується в головному процесі, як і раніше.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+import config
+import metrics
+
+SyncRunner = Callable[..., tuple[bool, str, int]]
+
+MAX_PARALLEL_SYNCS = 8  # потоків SyncJobRunner у режимі кількох рахунків (config.json: max_parallel_syncs)
+WORKER_POLL_SECONDS = 1.0  # як часто перевіряти, чи живий воркер, поки чекаємо результат
+WORKER_STOP_TIMEOUT = 10.0
+
+# spawn і на Linux: воркер не успадковує потоки HTTP-сервера і Tk (як на Windows)
+_mp = multiprocessing.get_context("spawn")
+
+
+def terminal_key(cfg: dict) -> str:
+    """Ключ терміналу: нормалізований mt5_path; "" — термінал за замовчуванням (автовизначення)."""
+    path = str(cfg.get("mt5_path") or "").strip()
+    if not path:
+        return ""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _worker_main(
+    sync_runner: SyncRunner,
+    config_path: str,
+    state_path: str,
+    requests: multiprocessing.Queue,
+    events: multiprocessing.Queue,
+) -> None:
+    """Цикл процесу-воркера: (cfg, profile) з requests → sync_runner → ("progress", stage, counts)… ("done", result, metrics)."""
+    config.CONFIG_PATH = Path(config_path)
+    config.STATE_PATH = Path(state_path)
+    import prefetch
+    from http_client import close_session
+    from mt5_sync import shutdown as mt5_shutdown
+
+    # Префетч воркера (prefetch: true) стартує після першого синку рахунку — run_sync викликає prefetch.watch
+    prefetch.enable()
+
+    def progress(stage: str, **counts: int) -> None:
+        events.put(("progress", stage, counts))
+
+    parent = multiprocessing.parent_process()
+    try:
+        while True:
+            try:
+                item = requests.get(timeout=WORKER_POLL_SECONDS)
+            except queue.Empty:
+                # Головний процес убитий (не закрито через shutdown) — не лишаємо сиротою підключений термінал
+                if parent is not None and not parent.is_alive():
+                    break
+                continue
+            if item is None:
+                break
+            cfg, profile = item
+            try:
+                if profile:
+                    result = sync_runner(cfg, progress=progress, profile=profile)
+                else:
+                    result = sync_runner(cfg, progress=progress)
+            except Exception as e:
+                result = (False, str(e), 0)
+            # Чекпоінти і курсори рахунку мають бути на диску до відповіді головному процесу
+            config.flush_state()
+            # Метрики етапів — у головний процес (/metrics), воркер рахує далі з нуля
+            events.put(("done", result, metrics.drain()))
+    finally:
+        prefetch.stop()
+        mt5_shutdown()
+        close_session()
+        config.flush_state()
+
+
+class AccountWorker:
+    """Процес, прив'язаний до одного терміналу. run() блокує до завершення синку; виклики серіалізуються."""
+
+    def __init__(self, key: str, sync_runner: SyncRunner) -> None:
+        self.key = key
+        self.sync_runner = sync_runner
+        self._lock = threading.Lock()
+        self._process: Optional[multiprocessing.Process] = None
+        self._requests: Optional[multiprocessing.Queue] = None
+        self._events: Optional[multiprocessing.Queue] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def _ensure_started(self) -> None:
+        if self.alive:
+            return
+        # Після падіння воркера черги могли лишитись з недочитаними подіями — створюємо нові
+        self._requests = _mp.Queue()
+        self._events = _mp.Queue()
+        self._process = _mp.Process(
+            target=_worker_main,
+            args=(self.sync_runner, str(config.CONFIG_PATH), str(config.STATE_PATH), self._requests, self._events),
+            name=f"sync-worker-{self.key or 'default'}",
+            daemon=True,
+        )
+        self._process.start()
+
+    def run(self, cfg: dict, progress: Callable[..., None], profile: Optional[str] = None) -> tuple[bool, str, int]:
+        with self._lock:
+            self._ensure_started()
+            self._requests.put((cfg, profile))
+            while True:
+                try:
+                    event = self._events.get(timeout=WORKER_POLL_SECONDS)
+                except queue.Empty:
+                    if not self._process.is_alive():
+                        code = self._process.exitcode
+                        self._process = None
+                        return False, f"Sync worker exited unexpectedly (code {code})", 0
+                    continue
+                if event[0] == "progress":
+                    progress(event[1], **event[2])
+                else:
+                    metrics.merge(event[2])
+                    return event[1]
+
+    def request_stop(self) -> None:
+        if self.alive:
+            self._requests.put(None)
+
+    def stop(self, timeout: float = WORKER_STOP_TIMEOUT) -> None:
+        """Завершити воркер після поточного синку (або примусово після timeout)."""
+        process = self._process
+        if process is None:
+            return
+        if process.is_alive():
+            self.request_stop()
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(1.0)
+        self._process = None
+
+
+class AccountDispatcher:
+    """sync_runner для SyncJobRunner: з одним рахунком — у цьому процесі, з кількома — у воркері терміналу рахунку."""
+
+    def __init__(self, sync_runner: SyncRunner) -> None:
+        self.sync_runner = sync_runner
+        self._lock = threading.Lock()
+        self._local_lock = threading.Lock()  # один термінал у головному процесі — синки по черзі
+        self._workers: dict[str, AccountWorker] = {}
+        self._local_open = True  # головний процес міг підключитись до терміналу (синк одного рахунку, префетч)
+
+    @staticmethod
+    def multi_account() -> bool:
+        return len(config.load_account_configs()) > 1
+
+    def run_sync(
+        self,
+        cfg: dict,
+        progress: Optional[Callable[..., None]] = None,
+        profile: Optional[str] = None,
+    ) -> tuple[bool, str, int]:
+        progress = progress or (lambda stage, **counts: None)
+        if not self.multi_account():
+            with self._local_lock:
+                self._local_open = True
+                if profile:
+                    return self.sync_runner(cfg, progress=progress, profile=profile)
+                return self.sync_runner(cfg, progress=progress)
+        self.release_local_terminal()
+        # Профіль пишеться у воркері — там виконується синк
+        return self.worker_for(cfg).run(cfg, progress, profile)
+
+    def release_local_terminal(self) -> None:
+        """Закрити MT5-сесію головного процесу і його префетч перед воркерами: інакше до одного терміналу
+        підключені два процеси (головний лишається залогіненим, поки воркер логіниться тим самим API)."""
+        import mt5_sync
+        import prefetch
+
+        with self._local_lock:  # дочекатись локального синку, що ще виконується
+            if not self._local_open:
+                return
+            prefetch.stop()
+            mt5_sync.shutdown()
+            self._local_open = False
+
+    def worker_for(self, cfg: dict) -> AccountWorker:
+        key = terminal_key(cfg)
+        with self._lock:
+            worker = self._workers.get(key)
+            if worker is None:
+                worker = self._workers[key] = AccountWorker(key, self.sync_runner)
+            return worker
+
+    def workers(self) -> list[dict]:
+        """Для /status: термінал і чи живий процес."""
+        with self._lock:
+            return [{"mt5_path": key, "alive": w.alive} for key, w in self._workers.items()]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        # Спершу сигнал усім, потім очікування — воркери завершуються паралельно
+        for worker in workers:
+            worker.request_stop()
+        for worker in workers:
+            worker.stop()
+
+
+def max_parallel_syncs(cfg: Optional[dict] = None) -> int:
+    try:
+        return max(1, int((cfg or {}).get("max_parallel_syncs") or MAX_PARALLEL_SYNCS))
+    except (TypeError, ValueError):
+        return MAX_PARALLEL_SYNCS
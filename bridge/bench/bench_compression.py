@@ -0,0 +1,64 @@
+"""
+Бенчмарк стиснення тіла POST /api/mt5/sync/deals: байти «на дроті» і повний час відвантаження
+(стиснення + передача через mock_api з обмеженою швидкістю) для 10k/100k угод.
+Приклад: python bench/bench_compression.py --sizes 10000 100000 --bandwidth 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+_bridge_dir = Path(__file__).resolve().parent.parent
+if str(_bridge_dir) not in sys.path:
+    sys.path.insert(0, str(_bridge_dir))
+
+import deal_arrays
+import fake_mt5
+from http_client import supported_encodings
+from mock_api import run_mock_api
+
+
+def _api_deals(n: int):
+    # Запас на BALANCE-операції, які to_api відкидає
+    fake_mt5.configure(deals=int(n * 1.02) + 10)
+    fake_mt5.initialize()
+    deals = deal_arrays.to_api(deal_arrays.from_mt5(fake_mt5.history_deals_get(0, 2 ** 40)))
+    return deals[:n]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deal upload compression benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--bandwidth", type=int, default=1_000_000, help="Mock API upload bandwidth, bytes/s")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock API response latency, seconds")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    from main import post_sync_deals
+
+    server = run_mock_api(latency=args.latency, bandwidth=args.bandwidth, accept_encodings=supported_encodings())
+    cfg = {
+        "api_base_url": server.url,
+        "sync_token": "bench",
+        "trading_account_id": "bench-account",
+        "upload_batch_size": args.batch_size,
+    }
+    print(f"bandwidth={args.bandwidth} B/s latency={args.latency}s batch={args.batch_size}")
+    print(f"{'deals':>8} {'encoding':>8} {'bytes':>12} {'ratio':>7} {'upload s':>9}")
+    for n in args.sizes:
+        deals = _api_deals(n)
+        baseline = None
+        for encoding in (None,) + supported_encodings():
+            before = server.stats.to_dict()["bytes_received"]
+            t0 = time.perf_counter()
+            ok = post_sync_deals(cfg, deals, content_encoding=encoding)
+            elapsed = time.perf_counter() - t0
+            sent = server.stats.to_dict()["bytes_received"] - before
+            baseline = baseline or sent
+            status = "" if ok else "  FAILED"
+            print(f"{len(deals):>8} {encoding or 'none':>8} {sent:>12,} {baseline / sent:>6.1f}x {elapsed:>9.2f}{status}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Мікробенчмарк накладних витрат config/state на один /sync-request:
+load_config() + get_language() ×3 (handler, run_sync, /status) — без кешу (читання і парсинг файлів щоразу)
+проти кешу з інвалідацією за mtime/розміром.
+Приклад: python bench/bench_config_cache.py --requests 20000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_bridge_dir = Path(__file__).resolve().parent.parent
+if str(_bridge_dir) not in sys.path:
+    sys.path.insert(0, str(_bridge_dir))
+
+import config
+
+
+def _uncached_load_config() -> dict:
+    with open(config.CONFIG_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _uncached_get_language() -> str:
+    if not config.STATE_PATH.exists():
+        return "uk"
+    with open(config.STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f).get("language", "uk") or "uk"
+
+
+def _per_request(load_config, get_language, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        load_config()
+        for _ in range(3):
+            get_language()
+    return (time.perf_counter() - t0) / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Config/state cache micro-benchmark")
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="tradetrack-config-bench-"))
+    config.CONFIG_PATH = tmp / "config.json"
+    config.STATE_PATH = tmp / "state.json"
+    config.save_config({
+        "api_base_url": "https://example.com",
+        "sync_token": "x" * 40,
+        "trading_account_id": "c" * 25,
+        "mt5_login": 12345678,
+        "mt5_password": "investor",
+        "mt5_server": "Broker-Demo",
+        "mt5_path": "",
+    })
+    config.save_language("en")
+    config.save_last_sync("2026-01-01T00:00:00+00:00")
+
+    before = _per_request(_uncached_load_config, _uncached_get_language, args.requests)
+    after = _per_request(config.load_config, config.get_language, args.requests)
+    print(f"requests={args.requests}")
+    print(f"uncached: {before * 1e6:8.1f} µs/request")
+    print(f"cached:   {after * 1e6:8.1f} µs/request  ({before / after:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
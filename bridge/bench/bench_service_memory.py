@@ -0,0 +1,160 @@
+"""
+Бенчмарк пам'яті режимів з локальним сервером: --service (без вікна) проти GUI.
+Кожен режим — окремий процес bridge на fake_mt5 + mock_api у тимчасовій папці (config.json/state.json):
+RSS після старту, після першого синку (усі угоди) і після кількох повторних синків, а також пік RSS.
+GUI потребує дисплея; без нього (Linux-сервер без X) рядок GUI пропускається — порівняння режимів лише там, де він є.
+Приклад: python bench/bench_service_memory.py --deals 100000 --syncs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+_bridge_dir = Path(__file__).resolve().parent.parent
+if str(_bridge_dir) not in sys.path:
+    sys.path.insert(0, str(_bridge_dir))
+
+from config_server import CONFIG_SERVER_HOST, CONFIG_SERVER_PORT
+from mock_api import run_mock_api
+
+BRIDGE_URL = f"http://{CONFIG_SERVER_HOST}:{CONFIG_SERVER_PORT}"
+START_TIMEOUT = 30.0
+SETTLE_SECONDS = 1.0
+
+# Процес bridge з config.json/state.json у тимчасовій папці (argv: bridge_dir, папка, прапорці main.py...)
+_BOOT = """
+import sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import config
+config.CONFIG_PATH = Path(sys.argv[2]) / "config.json"
+config.STATE_PATH = Path(sys.argv[2]) / "state.json"
+config.save_language("en")
+import main
+sys.argv = ["main.py", *sys.argv[3:]]
+main.main()
+"""
+
+
+def _rss_mb(pid: int) -> tuple[float, float]:
+    """(поточний RSS, пік RSS) процесу в МБ; Linux — /proc, Windows — GetProcessMemoryInfo."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000 | 0x0010, False, pid)  # QUERY_LIMITED_INFORMATION | VM_READ
+        counters = Counters()
+        counters.cb = ctypes.sizeof(Counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb)
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return counters.WorkingSetSize / 2 ** 20, counters.PeakWorkingSetSize / 2 ** 20
+    fields = {}
+    with open(f"/proc/{pid}/status", encoding="ascii") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value
+    return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+
+
+def _request(path: str, method: str = "GET", timeout: float = 600.0) -> dict:
+    req = urllib.request.Request(f"{BRIDGE_URL}{path}", method=method)
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return json.loads(r.read().decode("utf-8"))
+
+
+def _wait_ready(process: subprocess.Popen) -> bool:
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            _request("/status", timeout=2.0)
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def _measure(mode: str, flags: list[str], workdir: Path, syncs: int, env: dict) -> Optional[dict]:
+    process = subprocess.Popen(
+        [sys.executable, "-c", _BOOT, str(_bridge_dir), str(workdir), *flags],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        if not _wait_ready(process):
+            error = process.stderr.read().decode("utf-8", "replace").strip().splitlines() if process.poll() is not None else []
+            print(f"{mode:>8}: did not start{': ' + error[-1] if error else ''}")
+            return None
+        time.sleep(SETTLE_SECONDS)
+        idle, _ = _rss_mb(process.pid)
+        _request("/sync-request?wait=1", method="POST")
+        first, _ = _rss_mb(process.pid)
+        for _ in range(syncs - 1):
+            _request("/sync-request?wait=1", method="POST")
+        time.sleep(SETTLE_SECONDS)
+        steady, peak = _rss_mb(process.pid)
+        return {"idle": idle, "first": first, "steady": steady, "peak": peak}
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bridge RSS: headless service vs GUI")
+    parser.add_argument("--deals", type=int, default=100_000, help="Deals in fake MT5 history")
+    parser.add_argument("--syncs", type=int, default=3, help="Syncs per mode (the first uploads everything)")
+    parser.add_argument("--no-prefetch", action="store_true", help="Disable prefetch (it keeps the next batch in memory)")
+    parser.add_argument("--modes", nargs="+", default=["service", "gui"], choices=["service", "gui"])
+    args = parser.parse_args()
+
+    server = run_mock_api(track_last_deal=False)
+    env = dict(os.environ, TRADETRACK_MT5_BACKEND="fake", FAKE_MT5_DEALS=str(args.deals))
+    print(f"{'mode':>8} {'idle MB':>9} {'1st sync':>9} {'steady':>9} {'peak MB':>9}")
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            cfg = {
+                "api_base_url": server.url,
+                "sync_token": "bench",
+                "trading_account_id": "bench-account",
+                "mt5_login": 1,
+                "mt5_password": "bench",
+                "mt5_server": "Bench-Server",
+                "prefetch": not args.no_prefetch,
+            }
+            (workdir / "config.json").write_text(json.dumps(cfg), encoding="utf-8")
+            flags = ["--service"] if mode == "service" else []
+            result = _measure(mode, flags, workdir, max(1, args.syncs), env)
+            if result is not None:
+                print(f"{mode:>8} {result['idle']:>9.1f} {result['first']:>9.1f} {result['steady']:>9.1f} {result['peak']:>9.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Бенчмарк пікової пам'яті відвантаження угод: старий шлях (list[dict] з _asdict → list[dict] API → один JSON-рядок)
+проти пакетного буфера (upload_streaming: false) і потокового кодувальника (chunked, за замовчуванням).
+mock_api працює в окремому процесі, тож tracemalloc рахує лише клієнтську сторону.
+Приклад: python bench/bench_upload_memory.py --deals 200000
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+_bridge_dir = Path(__file__).resolve().parent.parent
+if str(_bridge_dir) not in sys.path:
+    sys.path.insert(0, str(_bridge_dir))
+
+import fake_mt5
+
+
+def _serve_mock(port_queue: multiprocessing.Queue) -> None:
+    from mock_api import run_mock_api
+    server = run_mock_api(track_last_deal=False)
+    port_queue.put(server.server_address[1])
+    while True:
+        time.sleep(3600)
+
+
+def _legacy_upload(cfg: dict, raw: tuple) -> bool:
+    """Шлях до колонкового перетворення: _asdict на кожну угоду, цикл у Python, requests json=."""
+    import requests
+    mt5_deals = [d._asdict() for d in raw]
+    api_deals = []
+    for d in mt5_deals:
+        deal_type = d.get("type", 0)
+        if deal_type not in (0, 1):
+            continue
+        position_id = d.get("position_id") or d.get("ticket", 0)
+        api_deals.append({
+            "ticket": d.get("ticket"),
+            "positionId": int(position_id),
+            "symbol": d.get("symbol", ""),
+            "direction": "BUY" if deal_type == 0 else "SELL",
+            "profit": float(d.get("profit", 0) or 0),
+            "volume": float(d.get("volume", 0) or 0),
+            "price": float(d.get("price", 0) or 0),
+            "time": int(d.get("time") or 0),
+            "commission": float(d.get("commission", 0) or 0),
+            "swap": float(d.get("swap", 0) or 0),
+        })
+    r = requests.post(
+        f"{cfg['api_base_url']}/api/mt5/sync/deals",
+        json={"trading_account_id": cfg["trading_account_id"], "deals": api_deals},
+        headers={"Authorization": "Bearer bench"},
+        timeout=600,
+    )
+    return r.status_code == 200
+
+
+def _columnar_upload(cfg: dict, raw: tuple) -> bool:
+    import deal_arrays
+    from main import post_sync_deals
+    return post_sync_deals(cfg, deal_arrays.to_api(deal_arrays.from_mt5(raw)))
+
+
+def _measure(name: str, fn, cfg: dict, raw: tuple) -> None:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    ok = fn(cfg, raw)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} ok={ok!s:<5} time={elapsed:6.2f}s  peak={peak / 1024 / 1024:8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deal upload peak-memory benchmark")
+    parser.add_argument("--deals", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    port_queue: multiprocessing.Queue = multiprocessing.Queue()
+    mock = multiprocessing.Process(target=_serve_mock, args=(port_queue,), daemon=True)
+    mock.start()
+    port = port_queue.get(timeout=30)
+
+    fake_mt5.configure(deals=args.deals)
+    fake_mt5.initialize()
+    raw = fake_mt5.history_deals_get(0, 2 ** 40)
+    base_cfg = {
+        "api_base_url": f"http://127.0.0.1:{port}",
+        "sync_token": "bench",
+        "trading_account_id": "bench-account",
+        "upload_batch_size": args.batch_size,
+    }
+    print(f"deals={len(raw)} batch={args.batch_size}")
+    _measure("legacy (one JSON)", _legacy_upload, base_cfg, raw)
+    _measure("batched buffer", _columnar_upload, {**base_cfg, "upload_streaming": False}, raw)
+    _measure("streaming (chunked)", _columnar_upload, base_cfg, raw)
+    _measure("streaming, 1 batch", _columnar_upload, {**base_cfg, "upload_batch_size": len(raw)}, raw)
+    mock.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Бенчмарк форматів тіла POST /api/mt5/sync/deals (wire.py): байти, час побудови тіла в bridge
+і час розбору на стороні сервера (json.loads / msgpack.unpackb) — для масиву об'єктів, колонкового JSON і MessagePack.
+Приклад: python bench/bench_wire_format.py --deals 5000 100000
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+_bridge_dir = Path(__file__).resolve().parent.parent
+if str(_bridge_dir) not in sys.path:
+    sys.path.insert(0, str(_bridge_dir))
+
+import deal_arrays
+import fake_mt5
+import wire
+
+
+def _api_deals(n: int):
+    # Запас на BALANCE-операції, які to_api відкидає
+    fake_mt5.configure(deals=int(n * 1.02) + 10)
+    fake_mt5.initialize()
+    deals = deal_arrays.to_api(deal_arrays.from_mt5(fake_mt5.history_deals_get(0, 2 ** 40)))
+    return deals[:n]
+
+
+def _parse(wire_format: str, raw: bytes) -> object:
+    if wire_format == wire.FORMAT_MSGPACK:
+        return wire.msgpack.unpackb(raw, raw=False)
+    return json.loads(raw)
+
+
+def _best_of(repeat: int, fn, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deal payload wire format benchmark")
+    parser.add_argument("--deals", type=int, nargs="+", default=[5_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N timings")
+    args = parser.parse_args()
+
+    formats = (wire.FORMAT_JSON,) + wire.supported_formats()[::-1]
+    print(f"{'deals':>8} {'format':>8} {'bytes':>12} {'gzip bytes':>12} {'build ms':>9} {'parse ms':>9}")
+    for n in args.deals:
+        deals = _api_deals(n)
+        for wire_format in formats:
+            body = wire.deals_body(wire_format, "bench-account", deals)
+            build, raw = _best_of(args.repeat, body.to_bytes)
+            parse, _ = _best_of(args.repeat, _parse, wire_format, raw)
+            packed = len(gzip.compress(raw, compresslevel=6))
+            print(f"{len(deals):>8} {wire_format:>8} {len(raw):>12,} {packed:>12,} {build * 1000:>9.1f} {parse * 1000:>9.1f}")
+    if not wire.MSGPACK_AVAILABLE:
+        print("msgpack is not installed — MessagePack format skipped (pip install msgpack)")
+
+
+if __name__ == "__main__":
+    main()
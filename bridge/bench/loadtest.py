@@ -0,0 +1,196 @@
+"""
+Навантажувальний тест повного синку без MT5 і без сайту: fake_mt5 + mock_api → main.run_sync.
+Приклад: python bench/loadtest.py --deals 1000000 --latency 0.05 --bandwidth 2000000
+Звіт: час, угод/с, пікова пам'ять (RSS; з --tracemalloc — також пік Python-алокацій).
+--accounts N: N рахунків на окремих fake-терміналах, синки паралельно через процеси-воркери (account_workers).
+--prefetch: перед кожним синком префетчер встигає оновити теплий пакет (prefetch.py).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+_bridge_dir = Path(__file__).resolve().parent.parent
+if str(_bridge_dir) not in sys.path:
+    sys.path.insert(0, str(_bridge_dir))
+
+import threading
+
+import config
+import fake_mt5
+import metrics
+import mt5_sync
+from mock_api import run_mock_api
+from wire import supported_formats
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    # Linux: KiB, macOS: байти
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TradeTrack bridge load test (fake MT5 + mock API)")
+    parser.add_argument("--deals", type=int, default=100_000, help="Deals in fake MT5 history (1k–5M)")
+    parser.add_argument("--days", type=int, default=30, help="History depth in days")
+    parser.add_argument("--symbols", type=int, default=40, help="Distinct symbols")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mt5-latency-ms", type=float, default=0.0, help="Delay of each fake MT5 call")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock API response latency, seconds")
+    parser.add_argument("--bandwidth", type=int, default=0, help="Mock API upload bandwidth, bytes/s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of deal uploads answered with 503")
+    parser.add_argument("--upload-format", default="", help="upload_format: auto (negotiated with the mock) | json | columns | msgpack")
+    parser.add_argument("--positions", default="off", help="positions: off | alongside | instead")
+    parser.add_argument("--batch-size", type=int, default=0, help="upload_batch_size (0 = default)")
+    parser.add_argument("--runs", type=int, default=1, help="Sequential run_sync calls")
+    parser.add_argument("--new-deals", type=int, default=0, help="Deals added to fake MT5 before each run after the first")
+    parser.add_argument("--accounts", type=int, default=1, help="Accounts synced in parallel via worker processes")
+    parser.add_argument("--prefetch", action="store_true", help="Warm the next batch in the background before each run")
+    parser.add_argument("--tracemalloc", action="store_true", help="Track Python allocations (slower)")
+    args = parser.parse_args()
+
+    fake_mt5.configure(
+        deals=args.deals, days=args.days, symbols=args.symbols, seed=args.seed, latency_ms=args.mt5_latency_ms,
+    )
+    mt5_sync.use_backend(fake_mt5)
+    # Історію генеруємо до заміру — це вартість «терміналу», а не bridge
+    t0 = time.perf_counter()
+    generated = fake_mt5.seed()
+    print(f"Generated {generated} fake deals in {time.perf_counter() - t0:.2f}s")
+
+    tmp = Path(tempfile.mkdtemp(prefix="tradetrack-loadtest-"))
+    config.STATE_PATH = tmp / "state.json"
+    config.CONFIG_PATH = tmp / "config.json"
+    server = run_mock_api(
+        latency=args.latency, bandwidth=args.bandwidth, track_last_deal=False, error_rate=args.error_rate,
+        accept_formats=supported_formats(),
+    )
+    cfg = {
+        "api_base_url": server.url,
+        "sync_token": "loadtest",
+        "trading_account_id": "loadtest-account",
+        "mt5_login": 12345678,
+        "mt5_password": "investor",
+        "mt5_server": "Fake-Server",
+        "mt5_path": "",
+    }
+    if args.batch_size:
+        cfg["upload_batch_size"] = args.batch_size
+    # Без --upload-format — масив об'єктів, як і до колонкових форматів (порівнянність з попередніми замірами)
+    cfg["upload_format"] = args.upload_format or "json"
+    cfg["positions"] = args.positions
+    if args.prefetch:
+        import prefetch
+
+        prefetch.enable()
+        cfg["prefetch"] = True
+
+    from main import run_sync
+
+    if args.accounts > 1:
+        _run_accounts(args, cfg, run_sync)
+        print(f"Mock API: {server.stats.to_dict()}")
+        server.shutdown()
+        return
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    for i in range(args.runs):
+        if i and args.new_deals:
+            fake_mt5.add_deals(args.new_deals)
+        if args.prefetch:
+            _wait_prefetch(cfg)
+        t0 = time.perf_counter()
+        ok, msg, synced = run_sync(cfg)
+        elapsed = time.perf_counter() - t0
+        rate = synced / elapsed if elapsed > 0 else 0.0
+        print(f"run {i + 1}: ok={ok} synced={synced} time={elapsed:.3f}s rate={rate:,.0f} deals/s — {msg}")
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Python allocations peak: {peak / 1024 / 1024:.1f} MiB")
+    print("Stages:")
+    _print_stage_metrics()
+    print(f"Peak RSS: {_peak_rss_mb():.1f} MiB")
+    print(f"Mock API: {server.stats.to_dict()}")
+    server.shutdown()
+
+
+def _wait_prefetch(cfg: dict) -> None:
+    """Дочекатися одного оновлення теплого пакета — як пауза між синками, за яку префетчер встигає спрацювати."""
+    import prefetch
+
+    done = metrics.summary().get("prefetch", {}).get("count", 0)
+    prefetch.watch(cfg, refresh_now=True)
+    while metrics.summary().get("prefetch", {}).get("count", 0) <= done:
+        time.sleep(0.01)
+
+
+def _print_stage_metrics() -> None:
+    for stage, m in metrics.summary().items():
+        extra = "".join(f" {k}={m[k]}" for k in ("deals", "bytes") if k in m)
+        print(f"  {stage:<13} n={m['count']:<3} avg={m['avg_seconds'] * 1000:9.1f} ms "
+              f"failures={m['failures']}{extra}")
+
+
+def _run_accounts(args: argparse.Namespace, base_cfg: dict, run_sync) -> None:
+    """Кілька рахунків: кожен на своєму fake-терміналі (mt5_path) у власному процесі-воркері."""
+    from account_workers import AccountDispatcher
+    from config import load_account_configs, save_account_config
+
+    # Воркери — нові процеси (spawn): fake_mt5 і його параметри передаються через змінні середовища
+    os.environ.update({
+        "TRADETRACK_MT5_BACKEND": "fake",
+        "FAKE_MT5_DEALS": str(args.deals),
+        "FAKE_MT5_DAYS": str(args.days),
+        "FAKE_MT5_SYMBOLS": str(args.symbols),
+        "FAKE_MT5_SEED": str(args.seed),
+        "FAKE_MT5_LATENCY_MS": str(args.mt5_latency_ms),
+    })
+    for i in range(args.accounts):
+        save_account_config({
+            **base_cfg,
+            "trading_account_id": f"loadtest-account-{i + 1}",
+            "mt5_login": 10_000_000 + i,
+            "mt5_path": f"fake-terminal-{i + 1}",
+        })
+    accounts = [cfg for tid, cfg in sorted(load_account_configs().items()) if tid != "loadtest-account"]
+    dispatcher = AccountDispatcher(run_sync)
+    try:
+        for i in range(args.runs):
+            results: dict[str, tuple] = {}
+
+            def sync_one(cfg: dict) -> None:
+                t0 = time.perf_counter()
+                ok, msg, synced = dispatcher.run_sync(cfg)
+                results[cfg["trading_account_id"]] = (ok, synced, time.perf_counter() - t0, msg)
+
+            t0 = time.perf_counter()
+            threads = [threading.Thread(target=sync_one, args=(cfg,)) for cfg in accounts]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.perf_counter() - t0
+            for tid, (ok, synced, elapsed, msg) in sorted(results.items()):
+                print(f"run {i + 1} {tid}: ok={ok} synced={synced} time={elapsed:.3f}s — {msg}")
+            total_time = sum(r[2] for r in results.values())
+            total = sum(r[1] for r in results.values())
+            print(f"run {i + 1}: accounts={len(accounts)} synced={total} wall={wall:.3f}s "
+                  f"(sum of per-account times {total_time:.3f}s)")
+        print("Stages (all workers):")
+        _print_stage_metrics()
+    finally:
+        dispatcher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
+import atexit
+import copy
 import json
+import os
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import msvcrt
+except ImportError:  # не Windows
+    msvcrt = None
+    import fcntl
 
 
 def get_base_dir() -> Path:
@@ -15,59 +27,369 @@ CONFIG_PATH = get_base_dir() / "config.json"
 STATE_PATH = get_base_dir() / "state.json"
 
 
+class _JsonFileCache:
+    """Розпарсений JSON-файл у пам'яті; файл перечитується лише коли змінились mtime або розмір."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stamp: Optional[tuple] = None  # (path, mtime_ns, size)
+        self._data: Optional[dict] = None
+
+    def read(self, path: Path) -> Optional[dict]:
+        """Вміст файлу (не копія — не змінювати) або None, якщо файлу немає."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._stamp = None
+                self._data = None
+            return None
+        stamp = (str(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if stamp == self._stamp:
+                return self._data
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._stamp = stamp
+            self._data = data
+        return data
+
+    def store(self, path: Path, data: dict) -> None:
+        """Оновити кеш після власного запису у файл (без повторного читання)."""
+        st = os.stat(path)
+        with self._lock:
+            self._stamp = (str(path), st.st_mtime_ns, st.st_size)
+            self._data = copy.deepcopy(data)
+
+
+def _file_stamp(path: Path) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def write_json_atomic(path: Path, data: dict) -> None:
+    """Запис через тимчасовий файл + os.replace: читач бачить або старий, або новий файл, але не обрізаний."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    for attempt in range(5):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            # Windows: файл тимчасово відкритий іншим процесом (антивірус, інший bridge)
+            if attempt == 4:
+                os.unlink(tmp)
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+
+FILE_LOCK_TIMEOUT = 30.0  # с: довше lock state.json не тримає жоден живий процес — далі помилка, а не вічне очікування
+FILE_LOCK_POLL = 0.05  # с: перша пауза між спробами; далі подвоюється до FILE_LOCK_POLL_MAX
+FILE_LOCK_POLL_MAX = 1.0
+
+
+def _acquire(try_lock, path: Path, timeout: float) -> None:
+    """Спроби try_lock() з паузами до дедлайну; TimeoutError — lock так і не звільнився (завислий процес)."""
+    deadline = time.monotonic() + timeout
+    delay = FILE_LOCK_POLL
+    while True:
+        try:
+            try_lock()
+            return
+        except OSError:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Lock {path} is held by another process for over {timeout:.0f} s") from None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, FILE_LOCK_POLL_MAX)
+
+
+@contextmanager
+def _file_lock(path: Path, timeout: float = FILE_LOCK_TIMEOUT) -> Iterator[None]:
+    """Міжпроцесний lock (файл <path>.lock): воркери рахунків пишуть state.json паралельно.
+    Неблокувальні спроби з дедлайном timeout: завислий власник lock не блокує решту процесів назавжди."""
+    lock_path = path.with_name(f"{path.name}.lock")
+    with open(lock_path, "a+b") as f:
+        if msvcrt is not None:
+            f.seek(0)
+            _acquire(lambda: msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1), lock_path, timeout)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            _acquire(lambda: fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB), lock_path, timeout)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+STATE_FLUSH_DELAY = 0.2  # с: серія оновлень за цей час записується одним flush
+
+
+class StateStore:
+    """state.json у пам'яті: читання без звернення до диска (лише stat для зовнішніх змін),
+    записи серіалізовані під lock і зливаються в один атомарний flush.
+    Зміни відстежуються на рівні ключ / ключ.підключ, тож flush накладає їх на свіжу версію файлу
+    і не перетирає чужі оновлення (інший процес, інший рахунок)."""
+
+    def __init__(self, flush_delay: float = STATE_FLUSH_DELAY) -> None:
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._path: Optional[Path] = None
+        self._stamp: Optional[tuple] = None  # (mtime_ns, size) файлу, з яким узгоджено _data
+        self._data: dict = {}
+        self._dirty: set[tuple] = set()
+        self._timer: Optional[threading.Timer] = None
+
+    @staticmethod
+    def _read_file(path: Path) -> dict:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _overlay(self, base: dict) -> dict:
+        """base (з диска) + наші незаписані зміни."""
+        merged = copy.deepcopy(base)
+        for path in sorted(self._dirty, key=len):
+            if len(path) == 1:
+                if path[0] in self._data:
+                    merged[path[0]] = copy.deepcopy(self._data[path[0]])
+                else:
+                    merged.pop(path[0], None)
+                continue
+            key, sub = path
+            ours = self._data.get(key)
+            target = merged.get(key)
+            if not isinstance(target, dict):
+                target = merged[key] = {}
+            if isinstance(ours, dict) and sub in ours:
+                target[sub] = copy.deepcopy(ours[sub])
+            else:
+                target.pop(sub, None)
+            if not target:
+                merged.pop(key, None)
+        return merged
+
+    def _sync_locked(self) -> None:
+        path = STATE_PATH
+        if path != self._path:
+            if self._dirty:
+                self._flush_locked()
+            self._path = path
+            self._stamp = None
+            self._data = {}
+            self._dirty.clear()
+        stamp = _file_stamp(path)
+        if stamp != self._stamp:
+            self._data = self._overlay(self._read_file(path))
+            self._stamp = stamp
+
+    def view(self) -> dict:
+        """Поточний стан без копіювання — лише для читання."""
+        with self._lock:
+            self._sync_locked()
+            return self._data
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._sync_locked()
+            return copy.deepcopy(self._data)
+
+    def update(self, changes: dict, flush: bool = False) -> None:
+        """changes: {key: value} або {(key, subkey): value}; value None для підключа — видалити."""
+        with self._lock:
+            self._sync_locked()
+            for path, value in changes.items():
+                if isinstance(path, tuple):
+                    key, sub = path
+                    section = self._data.get(key)
+                    if not isinstance(section, dict):
+                        section = self._data[key] = {}
+                    if value is None:
+                        section.pop(sub, None)
+                        if not section:
+                            del self._data[key]
+                    else:
+                        section[sub] = value
+                    self._dirty.add((key, sub))
+                else:
+                    self._data[path] = value
+                    self._dirty.add((path,))
+            if flush or self.flush_delay <= 0:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def replace(self, data: dict) -> None:
+        """Повна заміна стану (_save_state): змінені й видалені ключі верхнього рівня позначаються брудними."""
+        with self._lock:
+            self._sync_locked()
+            for key in set(self._data) | set(data):
+                if self._data.get(key) != data.get(key):
+                    self._dirty.add((key,))
+            self._data = copy.deepcopy(data)
+            self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._dirty or self._path is None:
+            return
+        # Читання-злиття-запис під міжпроцесним lock, інакше два воркери губили б зміни один одного
+        with _file_lock(self._path):
+            merged = self._overlay(self._read_file(self._path))
+            write_json_atomic(self._path, merged)
+            self._stamp = _file_stamp(self._path)
+        self._data = merged
+        self._dirty.clear()
+
+
+_config_cache = _JsonFileCache()
+_state = StateStore()
+atexit.register(_state.flush)
+
+
 def save_config(config_dict: dict) -> None:
     """Зберегти конфіг (викликається після отримання з фронту)."""
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump(config_dict, f, indent=2)
+    write_json_atomic(CONFIG_PATH, config_dict)
+    _config_cache.store(CONFIG_PATH, config_dict)
 
 
 def load_config() -> dict:
-    if not CONFIG_PATH.exists():
+    data = _config_cache.read(CONFIG_PATH)
+    if data is None:
         raise FileNotFoundError(
             f"Config not found: {CONFIG_PATH}\n"
             "Run the app and connect from the web app (bridge section)."
         )
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return copy.deepcopy(data)
 
 
-def _load_state() -> dict:
-    if not STATE_PATH.exists():
-        return {}
+# Поля підключення рахунку (приходять з POST /config); решта ключів config.json — локальні налаштування
+ACCOUNT_KEYS = ("api_base_url", "sync_token", "trading_account_id", "mt5_login", "mt5_password", "mt5_server", "mt5_path")
+
+
+def save_account_config(account: dict) -> None:
+    """Додати або оновити рахунок. Верхній рівень config.json — останній підключений рахунок
+    (--sync-only, /sync-request без trading_account_id); з другим рахунком з'являється секція accounts."""
     try:
-        with open(STATE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, KeyError):
+        cfg = load_config()
+    except FileNotFoundError:
+        cfg = {}
+    tid = account["trading_account_id"]
+    accounts = cfg.get("accounts") or {}
+    current = cfg.get("trading_account_id")
+    if current and current != tid:
+        accounts.setdefault(current, {k: cfg[k] for k in ACCOUNT_KEYS if k in cfg})
+    if accounts:
+        accounts[tid] = {**accounts.get(tid, {}), **account}
+        cfg["accounts"] = accounts
+    cfg.update(account)
+    save_config(cfg)
+
+
+def load_account_configs() -> dict[str, dict]:
+    """trading_account_id → повний конфіг рахунку (локальні налаштування верхнього рівня + поля рахунку)."""
+    try:
+        cfg = load_config()
+    except FileNotFoundError:
         return {}
+    base = {k: v for k, v in cfg.items() if k != "accounts"}
+    result = {}
+    if base.get("trading_account_id"):
+        result[base["trading_account_id"]] = base
+    for tid, account in (cfg.get("accounts") or {}).items():
+        if isinstance(account, dict):
+            result[tid] = {**base, **account}
+    return result
+
+
+def load_account_config(trading_account_id: str) -> Optional[dict]:
+    return load_account_configs().get(trading_account_id)
+
+
+def _load_state() -> dict:
+    return _state.snapshot()
 
 
 def _save_state(data: dict) -> None:
-    with open(STATE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    _state.replace(data)
+
+
+def flush_state() -> None:
+    """Записати відкладені зміни state.json (перед виходом з програми)."""
+    _state.flush()
 
 
 def load_last_sync() -> Optional[str]:
-    return _load_state().get("last_sync_at")
+    return _state.view().get("last_sync_at")
 
 
 def save_last_sync(iso_datetime: str) -> None:
-    data = _load_state()
-    data["last_sync_at"] = iso_datetime
-    _save_state(data)
+    _state.update({"last_sync_at": iso_datetime})
+
+
+def load_upload_checkpoint(trading_account_id: str) -> Optional[dict]:
+    """Незавершене відвантаження: {"from_time": ISO, "last_ticket": int} — останній підтверджений сервером тікет."""
+    checkpoint = _state.view().get("upload_checkpoints", {}).get(trading_account_id)
+    return dict(checkpoint) if isinstance(checkpoint, dict) else None
+
+
+def save_upload_checkpoint(trading_account_id: str, checkpoint: dict) -> None:
+    _state.update({("upload_checkpoints", trading_account_id): checkpoint})
+
+
+def clear_upload_checkpoint(trading_account_id: str) -> None:
+    if trading_account_id in _state.view().get("upload_checkpoints", {}):
+        _state.update({("upload_checkpoints", trading_account_id): None})
+
+
+def load_account_state(trading_account_id: str) -> dict:
+    """Курсор і результат останнього синку рахунку: last_sync_at, last_ticket, last_error, last_error_at."""
+    return dict(_state.view().get("accounts", {}).get(trading_account_id) or {})
+
+
+def save_account_state(trading_account_id: str, **fields: object) -> None:
+    """Оновити поля стану рахунку (None — видалити поле)."""
+    current = load_account_state(trading_account_id)
+    for key, value in fields.items():
+        if value is None:
+            current.pop(key, None)
+        else:
+            current[key] = value
+    _state.update({("accounts", trading_account_id): current or None})
 
 
 def has_saved_language() -> bool:
     """Чи збережено вибір мови (наступні запуски не питають)."""
-    return "language" in _load_state()
+    return "language" in _state.view()
 
 
 def get_language() -> str:
     """Повертає поточну мову: 'uk' або 'en'. За замовчуванням 'uk'."""
-    return _load_state().get("language", "uk") or "uk"
+    return _state.view().get("language", "uk") or "uk"
 
 
 def save_language(lang: str) -> None:
     """Зберігає вибрану мову в state.json."""
-    data = _load_state()
-    data["language"] = lang if lang in ("uk", "en") else "uk"
-    _save_state(data)
+    _state.update({"language": lang if lang in ("uk", "en") else "uk"}, flush=True)
@@ -1,15 +1,20 @@
 """
 Локальний сервер: POST /config від фронту, GET/POST /sync-request для синку без пулінгу.
 Сервер працює постійно; після /config не завершується — очікує /sync-request з браузера.
+Запити обробляються в окремих потоках; синк виконується фоновою задачею (/sync-jobs/<id>).
 """
 import json
 import queue
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
 
-from config import load_config, save_config, get_language
+import metrics
+from config import load_account_config, load_account_configs, load_config, save_account_config, get_language
 from i18n import get_text
+from sync_jobs import SYNC_DEBOUNCE_SECONDS, SyncJob, SyncJobRunner
 
 CONFIG_SERVER_HOST = "127.0.0.1"
 CONFIG_SERVER_PORT = 8765
@@ -24,10 +29,20 @@ def _send_cors_headers(handler: BaseHTTPRequestHandler) -> None:
     handler.send_header("Access-Control-Max-Age", "86400")
 
 
+def _sync_debounce(cfg: dict) -> float:
+    try:
+        return max(0.0, float(cfg.get("sync_debounce_seconds", SYNC_DEBOUNCE_SECONDS)))
+    except (TypeError, ValueError):
+        return SYNC_DEBOUNCE_SECONDS
+
+
 class BridgeHandler(BaseHTTPRequestHandler):
     """Обробник: /config, /sync-request; не завершує сервер після /config."""
     on_config_received: Optional[Callable[[], None]] = None
-    sync_runner: Optional[Callable[[dict], tuple[bool, str, int]]] = None  # (success, message, synced_count)
+    sync_runner: Optional[Callable[..., tuple[bool, str, int]]] = None  # (success, message, synced_count)
+    sync_jobs: Optional[SyncJobRunner] = None
+    workers_info: Optional[Callable[[], list]] = None  # воркери терміналів для /status (кілька рахунків)
+    profile_syncs: bool = False  # --profile: кожен синк під профайлером
     msg_queue: Optional[queue.Queue] = None  # (log|status, msg[, is_error])
 
     def log_message(self, format: str, *args: object) -> None:
@@ -64,13 +79,29 @@ class BridgeHandler(BaseHTTPRequestHandler):
                 "endpoints": {
                     "config": get_text("api_config_endpoint", lang),
                     "sync": get_text("api_sync_endpoint", lang),
+                    "sync_jobs": get_text("api_sync_jobs_endpoint", lang),
+                    "metrics": get_text("api_metrics_endpoint", lang),
                 },
                 "connected": connected,
                 "status": get_text("api_status_connected", lang) if connected else get_text("api_status_not_connected", lang),
+                "accounts": sorted(load_account_configs()),
+                "metrics": metrics.summary(),
             }
+            if BridgeHandler.workers_info is not None:
+                body["workers"] = BridgeHandler.workers_info()
             self.wfile.write(json.dumps(body, ensure_ascii=False).encode("utf-8"))
         elif self.path.startswith("/sync-request"):
             self._handle_sync_request()
+        elif self.path.startswith("/sync-jobs/"):
+            self._handle_sync_job()
+        elif urlparse(self.path).path == "/metrics":
+            data = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", metrics.PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            _send_cors_headers(self)
+            self.end_headers()
+            self.wfile.write(data)
         else:
             self.send_response(404)
             self.end_headers()
@@ -114,7 +145,8 @@ class BridgeHandler(BaseHTTPRequestHandler):
             "mt5_server": str(data["mt5_server"]).strip(),
             "mt5_path": str(data.get("mt5_path") or "").strip(),
         }
-        save_config(config)
+        # Рахунок додається до вже збережених; локальні налаштування (upload_batch_size тощо) не перетираються
+        save_account_config(config)
         self._send_json(200, {"ok": True, "message": "Config saved. Connecting..."})
         lang = get_language()
         self._log(get_text("log_config_from_browser", lang))
@@ -123,30 +155,93 @@ class BridgeHandler(BaseHTTPRequestHandler):
             BridgeHandler.on_config_received()
 
     def _handle_sync_request(self) -> None:
-        if BridgeHandler.sync_runner is None:
+        """Ставить синк у чергу і одразу відповідає 202 з job_id; ?wait=1 — чекати результат (як раніше, 200/500)."""
+        if BridgeHandler.sync_jobs is None:
             self._send_json(500, {"error": "Sync runner not set"})
             return
-        try:
-            cfg = load_config()
-        except FileNotFoundError:
-            self._send_json(400, {"error": "No config. Connect from browser first."})
-            return
+        account_id = self._requested_account_id()
+        if account_id:
+            cfg = load_account_config(account_id)
+            if cfg is None:
+                self._send_json(404, {"error": f"Unknown trading_account_id: {account_id}"})
+                return
+        else:
+            # Без trading_account_id — останній підключений рахунок (верхній рівень config.json)
+            try:
+                cfg = load_config()
+            except FileNotFoundError:
+                self._send_json(400, {"error": "No config. Connect from browser first."})
+                return
+            cfg = load_account_config(cfg.get("trading_account_id") or "") or cfg
         lang = get_language()
-        self._status(get_text("status_syncing", lang))
         self._log(get_text("log_sync_requested", lang))
-        self._log(get_text("status_syncing", lang))
-        success, message, synced = BridgeHandler.sync_runner(cfg)
+        query = parse_qs(urlparse(self.path).query)
+        profile = BridgeHandler.profile_syncs or query.get("profile", ["0"])[0] in ("1", "true")
+        # Подвійний клік / кілька вкладок: приєднуємось до синку, що вже йде (або щойно завершився)
+        job, coalesced = BridgeHandler.sync_jobs.submit_or_attach(cfg, debounce=_sync_debounce(cfg), profile=profile)
+        if coalesced:
+            self._log(get_text("log_sync_coalesced", lang))
+        else:
+            self._status(get_text("status_syncing", lang))
+            self._log(get_text("status_syncing", lang))
+        if query.get("wait", ["0"])[0] not in ("1", "true"):
+            self._send_json(202, {
+                "ok": True,
+                "job_id": job.id,
+                "status_url": f"/sync-jobs/{job.id}",
+                "coalesced": coalesced,
+            })
+            return
+        job.wait()
+        success, message, synced = job.result
+        extra = {"profile_reports": job.to_dict()["profile_reports"]} if job.profile else {}
         if success:
-            self._send_json(200, {"ok": True, "message": message, "synced": synced})
-            self._status(get_text("status_connected", lang))
+            self._send_json(200, {"ok": True, "message": message, "synced": synced, "job_id": job.id, "coalesced": coalesced, **extra})
+        else:
+            # 503 — синк не запускався: bridge зупинили, поки задача чекала в черзі
+            code = 503 if job.cancelled else 500
+            self._send_json(code, {"ok": False, "error": message, "job_id": job.id, "coalesced": coalesced, **extra})
+
+    def _requested_account_id(self) -> str:
+        """trading_account_id з query або з JSON-тіла POST (порожній рядок — не вказано)."""
+        query = parse_qs(urlparse(self.path).query)
+        account_id = query.get("trading_account_id", [""])[0]
+        content_length = int(self.headers.get("Content-Length", 0) or 0)
+        if not account_id and self.command == "POST" and content_length:
+            try:
+                data = json.loads(self.rfile.read(content_length).decode("utf-8"))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                data = None
+            if isinstance(data, dict):
+                account_id = str(data.get("trading_account_id") or "")
+        return account_id.strip()
+
+    def _handle_sync_job(self) -> None:
+        job_id = urlparse(self.path).path[len("/sync-jobs/"):].strip("/")
+        job = BridgeHandler.sync_jobs.get(job_id) if BridgeHandler.sync_jobs is not None else None
+        if job is None:
+            self._send_json(404, {"error": "Unknown job"})
+            return
+        self._send_json(200, job.to_dict())
+
+    @classmethod
+    def _on_sync_job_done(cls, job: SyncJob) -> None:
+        """Лог і статус у GUI після завершення фонового синку."""
+        if cls.msg_queue is None:
+            return
+        lang = get_language()
+        success, message, synced = job.result
+        if success:
+            cls.msg_queue.put(("status", get_text("status_connected", lang), False))
             if synced:
-                self._log(get_text("log_deals_sent", lang))
+                cls.msg_queue.put(("log", get_text("log_deals_sent", lang)))
             else:
-                self._log(f"{get_text('log_sync_done', lang)} {message}")
+                cls.msg_queue.put(("log", f"{get_text('log_sync_done', lang)} {message}"))
         else:
-            self._send_json(500, {"ok": False, "error": message})
-            self._status(get_text("status_mt5_error", lang), is_error=True)
-            self._log(f"{get_text('log_error', lang)} {message}")
+            cls.msg_queue.put(("status", get_text("status_mt5_error", lang), True))
+            cls.msg_queue.put(("log", f"{get_text('log_error', lang)} {message}"))
+        if job.profile:
+            cls.msg_queue.put(("log", f"{get_text('log_profile_saved', lang)} {Path(job.profile).parent}"))
 
     def _send_json(self, code: int, obj: dict) -> None:
         self.send_response(code)
@@ -157,27 +252,47 @@ class BridgeHandler(BaseHTTPRequestHandler):
 
 
 def run_bridge_server_forever(
-    sync_runner: Callable[[dict], tuple[bool, str, int]],
+    sync_runner: Callable[..., tuple[bool, str, int]],
     on_config_received: Callable[[], None],
     msg_queue: queue.Queue,
+    max_parallel_syncs: int = 1,
+    workers_info: Optional[Callable[[], list]] = None,
+    profile_syncs: bool = False,
 ):
-    """Запустити сервер на 8765 у фоні; повертає server для shutdown при закритті вікна."""
+    """Запустити сервер на 8765 у фоні; повертає server для shutdown при закритті вікна.
+    max_parallel_syncs > 1 — синки різних рахунків паралельно (sync_runner з account_workers)."""
     BridgeHandler.sync_runner = sync_runner
     BridgeHandler.on_config_received = on_config_received
     BridgeHandler.msg_queue = msg_queue
-    server = HTTPServer((CONFIG_SERVER_HOST, CONFIG_SERVER_PORT), BridgeHandler)
+    BridgeHandler.workers_info = workers_info
+    BridgeHandler.profile_syncs = profile_syncs
+    BridgeHandler.sync_jobs = SyncJobRunner(
+        sync_runner, on_done=BridgeHandler._on_sync_job_done, max_workers=max_parallel_syncs,
+    )
+    server = ThreadingHTTPServer((CONFIG_SERVER_HOST, CONFIG_SERVER_PORT), BridgeHandler)
+    server.daemon_threads = True
     thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
     return server
 
 
+def stop_bridge_server(server: ThreadingHTTPServer) -> None:
+    """Зупинити сервер і скасувати синки, що ще чекають у черзі (поточний дозавершується)."""
+    server.shutdown()
+    if BridgeHandler.sync_jobs is not None:
+        BridgeHandler.sync_jobs.shutdown()
+
+
 def run_config_server_until_received() -> None:
     """Режим консолі (без GUI): сервер до першого POST /config, потім завершення."""
     received = threading.Event()
     BridgeHandler.on_config_received = lambda: received.set()
     BridgeHandler.sync_runner = None
+    BridgeHandler.sync_jobs = None
     BridgeHandler.msg_queue = None
-    server = HTTPServer((CONFIG_SERVER_HOST, CONFIG_SERVER_PORT), BridgeHandler)
+    BridgeHandler.workers_info = None
+    server = ThreadingHTTPServer((CONFIG_SERVER_HOST, CONFIG_SERVER_PORT), BridgeHandler)
+    server.daemon_threads = True
     server_thread = threading.Thread(target=server.serve_forever, daemon=True)
     server_thread.start()
     print(f"Bridge: waiting for connection from browser.")
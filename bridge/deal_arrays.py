@@ -0,0 +1,130 @@
+"""
+Колонкове представлення угод (NumPy structured arrays).
+history_deals_get → from_mt5 (один масив) → to_api (фільтр і приведення типів векторно) → to_records лише на межі серіалізації.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+# MT5: type 0 = BUY, 1 = SELL; 2+ = BALANCE, CREDIT, CHARGE тощо — не відправляємо
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_IN = 0
+DIRECTIONS = ("BUY", "SELL")
+
+# Типи полів MetaTrader5.TradeDeal; невідомі поля — object
+_MT5_FIELD_TYPES = {
+    "volume": "f8",
+    "price": "f8",
+    "commission": "f8",
+    "swap": "f8",
+    "profit": "f8",
+    "fee": "f8",
+    "symbol": object,
+    "comment": object,
+    "external_id": object,
+}
+_MT5_INT_FIELDS = ("ticket", "order", "time", "time_msc", "type", "entry", "magic", "position_id", "reason")
+
+# Угоди у форматі веб-API; direction: 0 = BUY, 1 = SELL (рядок — лише в to_records)
+API_DEAL_DTYPE = np.dtype([
+    ("ticket", "i8"),
+    ("positionId", "i8"),
+    ("symbol", object),
+    ("direction", "i1"),
+    ("entry", "i1"),
+    ("profit", "f8"),
+    ("volume", "f8"),
+    ("price", "f8"),
+    ("time", "i8"),
+    ("commission", "f8"),
+    ("swap", "f8"),
+])
+
+# Поля запису для /api/mt5/sync/deals (порядок ключів як у JSON)
+RECORD_FIELDS = ("ticket", "positionId", "symbol", "direction", "profit", "volume", "price", "time", "commission", "swap")
+
+
+def _mt5_dtype(fields: Iterable[str]) -> np.dtype:
+    return np.dtype([
+        (f, "i8" if f in _MT5_INT_FIELDS else _MT5_FIELD_TYPES.get(f, object))
+        for f in fields
+    ])
+
+
+def _coerce_time(value: object) -> int:
+    if hasattr(value, "timestamp"):
+        return int(value.timestamp())
+    return int(value) if value is not None else 0
+
+
+def empty_mt5() -> np.ndarray:
+    return np.empty(0, dtype=_mt5_dtype(_MT5_INT_FIELDS + tuple(_MT5_FIELD_TYPES)))
+
+
+def from_mt5(deals: tuple) -> np.ndarray:
+    """Один structured array з результату history_deals_get (кортеж namedtuple TradeDeal)."""
+    if not deals:
+        return empty_mt5()
+    fields = deals[0]._fields
+    dtype = _mt5_dtype(fields)
+    try:
+        return np.array(list(deals), dtype=dtype)
+    except (TypeError, ValueError):
+        # time як datetime або None у числових полях — повільніший шлях з приведенням по колонках
+        arr = np.empty(len(deals), dtype=dtype)
+        for i, name in enumerate(fields):
+            column = [d[i] for d in deals]
+            if name == "time":
+                arr[name] = [_coerce_time(v) for v in column]
+            elif dtype[name] == object:
+                arr[name] = column
+            else:
+                arr[name] = [v or 0 for v in column]
+        return arr
+
+
+def to_api(deals: np.ndarray) -> np.ndarray:
+    """Лише реальні торги (BUY/SELL); position_id 0 → ticket. Повертає масив API_DEAL_DTYPE."""
+    types = deals["type"]
+    src = deals[(types == DEAL_TYPE_BUY) | (types == DEAL_TYPE_SELL)]
+    out = np.empty(len(src), dtype=API_DEAL_DTYPE)
+    out["ticket"] = src["ticket"]
+    position_id = src["position_id"]
+    out["positionId"] = np.where(position_id != 0, position_id, src["ticket"])
+    out["symbol"] = src["symbol"] if "symbol" in src.dtype.names else ""
+    out["direction"] = src["type"]
+    out["entry"] = src["entry"] if "entry" in src.dtype.names else 0
+    for name in ("profit", "volume", "price", "commission", "swap"):
+        # + 0.0 зводить -0.0 до 0.0 (як float(x or 0) у старому перетворенні)
+        out[name] = src[name] + 0.0 if name in src.dtype.names else 0.0
+    out["time"] = src["time"]
+    return out
+
+
+def last_deal(deals: np.ndarray) -> Optional[tuple[int, int]]:
+    """(тікет, час) угоди MT5 з найбільшим тікетом; None — угод немає."""
+    if len(deals) == 0:
+        return None
+    i = int(np.argmax(deals["ticket"]))
+    return int(deals["ticket"][i]), int(deals["time"][i])
+
+
+def opening_tickets(deals: np.ndarray) -> np.ndarray:
+    """Тікети угод MT5, що відкрили позицію, за зростанням. Ідентифікатор позиції в MT5 — тікет ордера відкриття,
+    тож угода відкриття — вхід, чий order дорівнює position_id; угода без позиції (position_id 0) — сама собі позиція."""
+    if len(deals) == 0:
+        return np.empty(0, dtype="i8")
+    position_id = deals["position_id"]
+    opens = (position_id == 0) | ((deals["entry"] == DEAL_ENTRY_IN) & (deals["order"] == position_id))
+    return np.unique(deals["ticket"][opens])
+
+
+def to_records(api_deals: np.ndarray) -> list[dict]:
+    """Межа серіалізації: масив API_DEAL_DTYPE → список dict для JSON."""
+    directions = np.array(DIRECTIONS, dtype=object)[api_deals["direction"]]
+    columns = [
+        directions.tolist() if name == "direction" else api_deals[name].tolist()
+        for name in RECORD_FIELDS
+    ]
+    return [dict(zip(RECORD_FIELDS, row)) for row in zip(*columns)]
@@ -0,0 +1,118 @@
+"""
+Локальний колонковий архів угод для аналітики: по файлу на колонку (сирі little-endian масиви) + manifest.json.
+Локальні інструменти відкривають його через open_store() як np.memmap — без копіювання і без парсингу JSON.
+Запис: дописати хвости колонок, потім атомарно оновити manifest (рядки понад manifest["rows"] ігноруються).
+"""
+import json
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import config
+from deal_arrays import API_DEAL_DTYPE
+
+STORE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_STORE_DIRNAME = "deals_store"
+
+# Колонки архіву; symbol зберігається кодами у словнику manifest["symbols"]
+STORE_COLUMNS = {
+    "ticket": "<i8",
+    "positionId": "<i8",
+    "symbol": "<i4",
+    "direction": "i1",
+    "entry": "i1",
+    "profit": "<f8",
+    "volume": "<f8",
+    "price": "<f8",
+    "time": "<i8",
+    "commission": "<f8",
+    "swap": "<f8",
+}
+
+
+def default_store_dir(trading_account_id: str) -> Path:
+    """deals_store/<trading_account_id> поруч зі state.json."""
+    return config.STATE_PATH.parent / DEFAULT_STORE_DIRNAME / (trading_account_id or "default")
+
+
+def _read_manifest(store_dir: Path) -> dict:
+    path = store_dir / MANIFEST_NAME
+    if not path.exists():
+        return {
+            "version": STORE_VERSION,
+            "rows": 0,
+            "columns": dict(STORE_COLUMNS),
+            "symbols": [],
+            "last_ticket": None,
+            "last_time": None,
+        }
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != STORE_VERSION:
+        raise ValueError(f"Unsupported deal store version: {manifest.get('version')}")
+    return manifest
+
+
+def last_exported_time(store_dir: Path) -> Optional[int]:
+    return _read_manifest(store_dir).get("last_time")
+
+
+def open_store(store_dir: Path) -> tuple[dict[str, np.ndarray], list[str]]:
+    """Колонки архіву як read-only np.memmap (нуль копій) і словник символів (symbol → symbols[code])."""
+    manifest = _read_manifest(Path(store_dir))
+    rows = int(manifest["rows"])
+    columns = {}
+    for name, dtype in manifest["columns"].items():
+        if rows == 0:
+            columns[name] = np.empty(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(Path(store_dir) / f"{name}.bin", dtype=dtype, mode="r", shape=(rows,))
+    return columns, list(manifest["symbols"])
+
+
+def append_deals(store_dir: Path, api_deals: np.ndarray) -> int:
+    """Дописати угоди (API_DEAL_DTYPE), яких ще немає в архіві (за тікетом). Повертає кількість доданих."""
+    if api_deals.dtype != API_DEAL_DTYPE:
+        raise TypeError("append_deals expects an API_DEAL_DTYPE array")
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(store_dir)
+    rows = int(manifest["rows"])
+
+    if rows and len(api_deals):
+        existing = np.memmap(store_dir / "ticket.bin", dtype=STORE_COLUMNS["ticket"], mode="r", shape=(rows,))
+        api_deals = api_deals[~np.isin(api_deals["ticket"], existing)]
+        del existing
+    if len(api_deals) == 0:
+        return 0
+    api_deals = api_deals[np.argsort(api_deals["ticket"], kind="stable")]
+
+    symbols: list[str] = manifest["symbols"]
+    index = {s: i for i, s in enumerate(symbols)}
+    uniques, inverse = np.unique(api_deals["symbol"].astype(str), return_inverse=True)
+    for s in uniques.tolist():
+        if s not in index:
+            index[s] = len(symbols)
+            symbols.append(s)
+    codes = np.array([index[s] for s in uniques.tolist()], dtype=np.int32)[inverse]
+
+    for name, dtype in STORE_COLUMNS.items():
+        values = codes if name == "symbol" else api_deals[name]
+        path = store_dir / f"{name}.bin"
+        with open(path, "ab") as f:
+            # Хвіст від обірваного запису (понад manifest rows) відкидаємо
+            f.truncate(rows * np.dtype(dtype).itemsize)
+            f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    manifest.update({
+        "rows": rows + len(api_deals),
+        "symbols": symbols,
+        "last_ticket": int(api_deals["ticket"].max()) if manifest["last_ticket"] is None
+        else max(int(manifest["last_ticket"]), int(api_deals["ticket"].max())),
+        "last_time": int(api_deals["time"].max()) if manifest["last_time"] is None
+        else max(int(manifest["last_time"]), int(api_deals["time"].max())),
+    })
+    config.write_json_atomic(store_dir / MANIFEST_NAME, manifest)
+    return len(api_deals)
@@ -0,0 +1,260 @@
+"""
+Емуляція модуля MetaTrader5 для навантажувального тестування без терміналу (Linux, CI).
+Вмикається змінною середовища TRADETRACK_MT5_BACKEND=fake або mt5_sync.use_backend(fake_mt5).
+Параметри: FAKE_MT5_DEALS (кількість угод, 1k–5M), FAKE_MT5_DAYS (глибина історії), FAKE_MT5_SEED,
+FAKE_MT5_SYMBOLS (кількість символів), FAKE_MT5_LATENCY_MS (затримка кожного виклику API).
+"""
+import bisect
+import os
+import random
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Optional
+
+# Поля в тому ж порядку, що й у MetaTrader5.TradeDeal
+TradeDeal = namedtuple(
+    "TradeDeal",
+    "ticket order time time_msc type entry magic position_id reason volume price "
+    "commission swap profit fee symbol comment external_id",
+)
+TerminalInfo = namedtuple("TerminalInfo", "connected trade_allowed build name path")
+AccountInfo = namedtuple("AccountInfo", "login server balance equity currency")
+SymbolInfo = namedtuple(
+    "SymbolInfo",
+    "name digits point trade_contract_size trade_tick_value trade_tick_size currency_base currency_profit",
+)
+
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_TYPE_BALANCE = 2
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+_BASE_SYMBOLS = (
+    "EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "NZDUSD", "USDCAD", "EURJPY",
+    "GBPJPY", "EURGBP", "XAUUSD", "XAGUSD", "US30", "NAS100", "SPX500", "GER40",
+    "BTCUSD", "ETHUSD", "USOIL", "UKOIL",
+)
+
+_settings = {
+    "deals": int(os.environ.get("FAKE_MT5_DEALS", "10000")),
+    "days": int(os.environ.get("FAKE_MT5_DAYS", "30")),
+    "seed": int(os.environ.get("FAKE_MT5_SEED", "42")),
+    "symbols": int(os.environ.get("FAKE_MT5_SYMBOLS", "40")),
+    "latency_ms": float(os.environ.get("FAKE_MT5_LATENCY_MS", "0")),
+}
+_deals: Optional[list] = None
+_times: Optional[list] = None
+_by_position: Optional[dict] = None  # position_id → угоди; будується при першому history_deals_get(position=...)
+_initialized = False
+_login: Optional[int] = None
+_server = ""
+_last_error = (1, "Success")
+
+
+def configure(**kwargs) -> None:
+    """Змінити параметри генерації (deals, days, seed, symbols, latency_ms); історія перегенерується."""
+    global _deals, _times, _by_position
+    unknown = set(kwargs) - set(_settings)
+    if unknown:
+        raise TypeError(f"Unknown fake MT5 settings: {', '.join(sorted(unknown))}")
+    _settings.update(kwargs)
+    _deals = None
+    _times = None
+    _by_position = None
+
+
+def symbols() -> list:
+    n = max(1, int(_settings["symbols"]))
+    names = list(_BASE_SYMBOLS[:n])
+    i = 0
+    while len(names) < n:
+        names.append(f"{_BASE_SYMBOLS[i % len(_BASE_SYMBOLS)]}.x{i // len(_BASE_SYMBOLS) + 1}")
+        i += 1
+    return names
+
+
+def _symbol_price(symbol: str) -> float:
+    if symbol.startswith("XAU"):
+        return 2000.0
+    if symbol.startswith(("US30", "NAS", "SPX", "GER")):
+        return 15000.0
+    if symbol.startswith(("BTC", "ETH")):
+        return 40000.0
+    if "JPY" in symbol:
+        return 150.0
+    return 1.1
+
+
+def _generate() -> None:
+    """Історія: пари IN/OUT по позиціях (BUY/SELL) та ~1% балансових операцій, відсортовано за часом."""
+    global _deals, _times, _by_position
+    rnd = random.Random(_settings["seed"])
+    total = max(0, int(_settings["deals"]))
+    names = symbols()
+    now = int(time.time())
+    start = now - int(_settings["days"]) * 86400
+    step = max(1, (now - start) // max(1, total))
+    deals = []
+    ticket = 100_000_000
+    t = start
+    open_positions: list = []
+    while len(deals) < total:
+        t += rnd.randint(0, 2 * step)
+        if t > now:
+            t = now
+        ticket += 1
+        r = rnd.random()
+        if r < 0.01:
+            amount = round(rnd.uniform(-500, 5000), 2)
+            deals.append(TradeDeal(
+                ticket, 0, t, t * 1000, DEAL_TYPE_BALANCE, 0, 0, 0, 0, 0.0, 0.0,
+                0.0, 0.0, amount, 0.0, "", "Deposit" if amount > 0 else "Withdrawal", "",
+            ))
+            continue
+        if open_positions and (r > 0.55 or len(deals) >= total - len(open_positions)):
+            pos_id, symbol, side, volume, price = open_positions.pop(rnd.randrange(len(open_positions)))
+            close_price = round(price * (1 + rnd.uniform(-0.01, 0.01)), 5)
+            sign = 1 if side == DEAL_TYPE_BUY else -1
+            profit = round(sign * (close_price - price) * volume * 1000, 2)
+            deals.append(TradeDeal(
+                ticket, ticket, t, t * 1000, 1 - side, DEAL_ENTRY_OUT, 0, pos_id, 3, volume, close_price,
+                round(-volume * 3.5, 2), round(rnd.uniform(-2, 0.5), 2), profit, 0.0, symbol, "", "",
+            ))
+            continue
+        symbol = names[rnd.randrange(len(names))]
+        side = rnd.choice((DEAL_TYPE_BUY, DEAL_TYPE_SELL))
+        volume = rnd.choice((0.01, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0))
+        price = round(_symbol_price(symbol) * (1 + rnd.uniform(-0.05, 0.05)), 5)
+        deals.append(TradeDeal(
+            ticket, ticket, t, t * 1000, side, DEAL_ENTRY_IN, 0, ticket, 3, volume, price,
+            round(-volume * 3.5, 2), 0.0, 0.0, 0.0, symbol, "", "",
+        ))
+        open_positions.append((ticket, symbol, side, volume, price))
+    _deals = deals
+    _times = [d.time for d in deals]
+    _by_position = None
+
+
+def seed(deals: Optional[int] = None) -> int:
+    """Згенерувати історію зараз, а не з першим history_deals_get (щоб генерація не потрапляла в замір).
+    deals — кількість угод (інакше з configure / FAKE_MT5_DEALS). Повертає кількість угод в історії."""
+    if deals is not None and deals != _settings["deals"]:
+        configure(deals=deals)
+    _ensure_history()
+    return len(_deals)
+
+
+def add_deals(count: int = 1, symbol: str = "EURUSD") -> None:
+    """Дописати нові угоди (BUY IN) з поточним часом — «торгівля» між синками."""
+    global _by_position
+    _ensure_history()
+    t = max(int(time.time()), _times[-1] if _times else 0)
+    ticket = (_deals[-1].ticket if _deals else 100_000_000)
+    price = _symbol_price(symbol)
+    for _ in range(count):
+        ticket += 1
+        _deals.append(TradeDeal(
+            ticket, ticket, t, t * 1000, DEAL_TYPE_BUY, DEAL_ENTRY_IN, 0, ticket, 3, 0.1, price,
+            -0.35, 0.0, 0.0, 0.0, symbol, "", "",
+        ))
+        _times.append(t)
+    _by_position = None
+
+
+def _ensure_history() -> None:
+    if _deals is None:
+        _generate()
+
+
+def _delay() -> None:
+    if _settings["latency_ms"] > 0:
+        time.sleep(_settings["latency_ms"] / 1000.0)
+
+
+def _to_ts(value) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def initialize(path: Optional[str] = None, timeout: int = 60000, **kwargs) -> bool:
+    global _initialized, _last_error
+    _delay()
+    _initialized = True
+    _last_error = (1, "Success")
+    return True
+
+
+def login(login: int, password: str = "", server: str = "", timeout: int = 60000) -> bool:
+    global _login, _server, _last_error
+    _delay()
+    if not _initialized:
+        _last_error = (-10004, "No IPC connection")
+        return False
+    _login = int(login)
+    _server = server
+    _last_error = (1, "Success")
+    return True
+
+
+def shutdown() -> None:
+    global _initialized, _login
+    _initialized = False
+    _login = None
+
+
+def last_error() -> tuple:
+    return _last_error
+
+
+def terminal_info() -> Optional[TerminalInfo]:
+    _delay()
+    if not _initialized:
+        return None
+    return TerminalInfo(True, True, 4000, "Fake MetaTrader 5", "/fake/terminal64.exe")
+
+
+def account_info() -> Optional[AccountInfo]:
+    _delay()
+    if not _initialized or _login is None:
+        return None
+    return AccountInfo(_login, _server, 10000.0, 10000.0, "USD")
+
+
+def symbol_info(symbol: str) -> Optional[SymbolInfo]:
+    _delay()
+    if not _initialized or not symbol:
+        return None
+    price = _symbol_price(symbol)
+    digits = 5 if price < 100 else (3 if price < 1000 else 2)
+    point = 10 ** -digits
+    return SymbolInfo(symbol, digits, point, 100000.0 if price < 1000 else 1.0, 1.0, point, symbol[:3], "USD")
+
+
+def history_deals_total(date_from, date_to) -> Optional[int]:
+    _delay()
+    if not _initialized:
+        return None
+    _ensure_history()
+    lo = bisect.bisect_left(_times, _to_ts(date_from))
+    hi = bisect.bisect_right(_times, _to_ts(date_to))
+    return max(0, hi - lo)
+
+
+def history_deals_get(date_from=None, date_to=None, position: Optional[int] = None, **kwargs) -> Optional[tuple]:
+    global _by_position
+    _delay()
+    if not _initialized:
+        return None
+    _ensure_history()
+    if position is not None:
+        if _by_position is None:
+            _by_position = {}
+            for deal in _deals:
+                _by_position.setdefault(deal.position_id, []).append(deal)
+        return tuple(_by_position.get(int(position), ()))
+    lo = bisect.bisect_left(_times, _to_ts(date_from)) if date_from is not None else 0
+    hi = bisect.bisect_right(_times, _to_ts(date_to)) if date_to is not None else len(_times)
+    return tuple(_deals[lo:hi])
@@ -4,6 +4,7 @@ GUI для TradeTrack Sync — вікно з описом програми, ст
 """
 import queue
 import sys
+from collections import deque
 import webbrowser
 from pathlib import Path
 from typing import Callable, Optional
@@ -22,6 +23,11 @@ from i18n import (
     SITE_CONTACT_URL_EN,
 )
 
+LOG_MAX_LINES = 2000  # рядків у лозі вікна: старіші обрізаються, тож віджет не росте тижнями
+QUEUE_BATCH_MAX = 1000  # повідомлень з msg_queue за один тік — решта в наступному, вікно не підвисає
+POLL_MIN_MS = 100  # інтервал опитування msg_queue, поки йдуть повідомлення
+POLL_MAX_MS = 1000  # стеля інтервалу в простої: без повідомлень інтервал подвоюється до неї
+
 
 def ask_language_at_startup() -> None:
     """Діалог вибору мови перед запуском. Показується лише при першому запуску; далі мова береться з state.json."""
@@ -173,23 +179,46 @@ def create_window(
         status_var.set(text)
         status_label.config(fg="red" if is_error else "gray")
 
-    def append_log(line: str) -> None:
+    def append_lines(lines: list[str]) -> None:
+        """Один insert на пакет рядків; понад LOG_MAX_LINES найстаріші рядки видаляються (кільцевий буфер)."""
+        if not lines:
+            return
         log_text.config(state=tk.NORMAL)
-        log_text.insert(tk.END, line + "\n")
+        log_text.insert(tk.END, "\n".join(lines) + "\n")
+        # Рядків у віджеті (після останнього \n — порожній рядок кінця)
+        excess = int(log_text.index("end-1c").split(".")[0]) - 1 - LOG_MAX_LINES
+        if excess > 0:
+            log_text.delete("1.0", f"{excess + 1}.0")
         log_text.see(tk.END)
         log_text.config(state=tk.DISABLED)
 
+    def append_log(line: str) -> None:
+        append_lines([line])
+
+    poll_ms = POLL_MIN_MS
+
     def process_queue() -> None:
+        nonlocal poll_ms
+        # Усі повідомлення тіку — одним записом у віджет; зі статусів важить лише останній
+        lines: deque[str] = deque(maxlen=LOG_MAX_LINES)
+        status = None
+        taken = 0
         try:
-            while True:
+            while taken < QUEUE_BATCH_MAX:
                 msg = msg_queue.get_nowait()
+                taken += 1
                 if msg[0] == "status":
-                    set_status(msg[1], is_error=msg[2] if len(msg) > 2 else False)
+                    status = msg
                 elif msg[0] == "log":
-                    append_log(msg[1])
+                    lines.append(msg[1])
         except queue.Empty:
             pass
-        root.after(200, process_queue)
+        if status is not None:
+            set_status(status[1], is_error=status[2] if len(status) > 2 else False)
+        append_lines(list(lines))
+        # Повідомлення були — швидкий тік; простій — інтервал подвоюється до POLL_MAX_MS
+        poll_ms = POLL_MIN_MS if taken else min(poll_ms * 2, POLL_MAX_MS)
+        root.after(poll_ms, process_queue)
 
     def on_close() -> None:
         if on_closing:
@@ -197,5 +226,5 @@ def create_window(
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_close)
-    root.after(200, process_queue)
+    root.after(POLL_MIN_MS, process_queue)
     return root, set_status, append_log
@@ -0,0 +1,116 @@
+"""
+Спільний HTTP-клієнт bridge для TradeTrack API: пул з'єднань, keep-alive, повтори з backoff.
+Сесія перебудовується лише коли змінюється api_base_url або sync_token.
+Стиснення тіла запиту (Content-Encoding: gzip/zstd) — з config.json або за можливостями з pending-sync.
+requests імпортується з першою сесією: режими без звернень до сервера (--export) і старт GUI його не чекають.
+"""
+import gzip
+import threading
+import zlib
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+POOL_MAXSIZE = 4
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5  # 0.5с, 1с, 2с між спробами
+RETRY_STATUSES = (429, 502, 503, 504)
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_lock = threading.Lock()
+_session: Optional["requests.Session"] = None
+_session_key: Optional[tuple[str, str]] = None
+
+
+def get_headers(cfg: dict) -> dict:
+    token = (cfg.get("sync_token") or "").strip()
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+
+def _build_session(cfg: dict) -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # POST-и bridge ідемпотентні (угоди — upsert за тікетом, sync-done/connected — прапорці), тож їх теж повторюємо
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(get_headers(cfg))
+    return session
+
+
+def get_session(cfg: dict) -> "requests.Session":
+    """Спільна сесія для api_base_url + sync_token з cfg; з'єднання перевикористовуються між викликами."""
+    global _session, _session_key
+    key = ((cfg.get("api_base_url") or "").rstrip("/"), (cfg.get("sync_token") or "").strip())
+    with _lock:
+        if _session is None or _session_key != key:
+            if _session is not None:
+                _session.close()
+            _session = _build_session(cfg)
+            _session_key = key
+        return _session
+
+
+def close_session() -> None:
+    """Закрити з'єднання пулу (при виході з програми)."""
+    global _session, _session_key
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_key = None
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Кодування тіла, які bridge вміє відправляти, у порядку переваги."""
+    return ("zstd", "gzip") if ZSTD_AVAILABLE else ("gzip",)
+
+
+def choose_content_encoding(cfg: dict, pending: Optional[dict]) -> Optional[str]:
+    """config.json upload_compression: auto (за замовчуванням) | gzip | zstd | none.
+    auto — перше з supported_encodings(), яке сервер оголосив у pending-sync (accept_encodings); інакше без стиснення."""
+    mode = str(cfg.get("upload_compression") or "auto").strip().lower()
+    if mode == "auto":
+        offered = pending.get("accept_encodings") if isinstance(pending, dict) else None
+        if not isinstance(offered, list):
+            return None
+        return next((enc for enc in supported_encodings() if enc in offered), None)
+    if mode == "zstd" and not ZSTD_AVAILABLE:
+        return "gzip"
+    return mode if mode in ("gzip", "zstd") else None
+
+
+def compress_body(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return body
+
+
+def compressor(encoding: Optional[str]):
+    """Потоковий компресор (compress/flush) для chunked-тіла або None без стиснення."""
+    if encoding == "gzip":
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return None
@@ -70,6 +70,11 @@ TEXTS: dict[str, dict[str, str]] = {
         "uk": "Отримано запит «Отримати угоди» з сайту.",
         "en": "Received «Get trades» request from the site.",
     },
+    "log_profile_saved": {"uk": "Звіт профілювання збережено:", "en": "Profile report saved:"},
+    "log_sync_coalesced": {
+        "uk": "Синхронізація вже виконується — запит приєднано до неї.",
+        "en": "A sync is already running — the request was attached to it.",
+    },
     "log_deals_sent": {
         "uk": "Угоди успішно відправлено на TradeTrack.",
         "en": "Deals sent to TradeTrack successfully.",
@@ -82,6 +87,14 @@ TEXTS: dict[str, dict[str, str]] = {
         "uk": "Не вдалося відправити угоди на сервер.",
         "en": "Failed to send deals to the server.",
     },
+    "msg_send_deals_partial": {
+        "uk": "Відправлено {} з {} угод; решту буде дослано при наступній синхронізації.",
+        "en": "Sent {} of {} deals; the rest will be sent on the next sync.",
+    },
+    "msg_outbox_failed": {
+        "uk": "Не вдалося дослати угоди, збережені після минулої синхронізації; повтор при наступній.",
+        "en": "Failed to send deals saved from the previous sync; they will be retried on the next sync.",
+    },
     "msg_mt5_connect_failed": {"uk": "Помилка підключення MT5: {}", "en": "MT5 connection failed: {}"},
     "msg_mt5_hint": {
         "uk": " (перевірте «Автоторгівля» в MT5 та інвестор-пароль)",
@@ -97,7 +110,15 @@ TEXTS: dict[str, dict[str, str]] = {
     "api_status_connected": {"uk": "Підключено (конфіг збережено)", "en": "Connected (config saved)"},
     "api_status_not_connected": {"uk": "Не підключено — надішліть конфіг з браузера", "en": "Not connected — send config from browser"},
     "api_config_endpoint": {"uk": "POST /config — підключення з браузера", "en": "POST /config — connect from browser"},
-    "api_sync_endpoint": {"uk": "GET|POST /sync-request — отримати угоди (кнопка «Отримати угоди» на сайті)", "en": "GET|POST /sync-request — get deals (button «Get trades» on site)"},
+    "api_sync_endpoint": {"uk": "GET|POST /sync-request — отримати угоди (кнопка «Отримати угоди» на сайті); 202 + job_id, ?wait=1 — дочекатися результату, ?trading_account_id=… — рахунок (кілька рахунків)", "en": "GET|POST /sync-request — get deals (button «Get trades» on site); 202 + job_id, ?wait=1 — wait for the result, ?trading_account_id=… — account (several accounts)"},
+    "api_metrics_endpoint": {
+        "uk": "GET /metrics — метрики етапів синку у форматі Prometheus (тривалість, угоди, байти, помилки)",
+        "en": "GET /metrics — sync stage metrics in Prometheus format (duration, deals, bytes, failures)",
+    },
+    "api_sync_jobs_endpoint": {
+        "uk": "GET /sync-jobs/<id> — стан фонового синку (етап, кількість угод, результат)",
+        "en": "GET /sync-jobs/<id> — background sync status (stage, deal counts, result)",
+    },
     "tab_main": {"uk": "Головна", "en": "Main"},
     "tab_settings": {"uk": "Налаштування", "en": "Settings"},
     "settings_restart_hint": {
@@ -0,0 +1,90 @@
+"""
+Локальний журнал доставлених угод (SQLite поруч зі state.json): які тікети сервер уже підтвердив.
+Синк порівнює результат get_deals з журналом і відправляє лише нові тікети.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import config
+
+LEDGER_FILENAME = "ledger.db"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS delivered (
+        account_id TEXT NOT NULL,
+        ticket INTEGER NOT NULL,
+        time INTEGER NOT NULL,
+        PRIMARY KEY (account_id, ticket)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS delivered_time ON delivered (account_id, time)",
+)
+
+
+class DealLedger:
+    """Тікети, підтверджені сервером, з індексом за (рахунок, тікет) і (рахунок, час)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def delivered_mask(self, account_id: str, tickets: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Булева маска: True — тікет уже доставлено. Читаються лише записи з діапазону times."""
+        if len(tickets) == 0:
+            return np.zeros(0, dtype=bool)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticket FROM delivered WHERE account_id = ? AND time BETWEEN ? AND ?",
+                (account_id, int(times.min()), int(times.max())),
+            ).fetchall()
+        if not rows:
+            return np.zeros(len(tickets), dtype=bool)
+        seen = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        return np.isin(tickets, seen)
+
+    def record(self, account_id: str, tickets: np.ndarray, times: np.ndarray) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO delivered (account_id, ticket, time) VALUES (?, ?, ?)",
+                ((account_id, t, tm) for t, tm in zip(tickets.tolist(), times.tolist())),
+            )
+            self._conn.commit()
+
+    def last_time(self, account_id: str) -> Optional[int]:
+        """Час останньої доставленої угоди рахунку (секунди UTC) або None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(time) FROM delivered WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_ledger_lock = threading.Lock()
+_ledger: Optional[DealLedger] = None
+
+
+def get_ledger() -> DealLedger:
+    """Спільний журнал у папці state.json (відкривається при першому зверненні)."""
+    global _ledger
+    path = config.STATE_PATH.parent / LEDGER_FILENAME
+    with _ledger_lock:
+        if _ledger is None or _ledger.path != path:
+            if _ledger is not None:
+                _ledger.close()
+            _ledger = DealLedger(path)
+        return _ledger
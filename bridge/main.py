@@ -10,37 +10,80 @@ _bridge_dir = Path(__file__).resolve().parent
 if str(_bridge_dir) not in sys.path:
     sys.path.insert(0, str(_bridge_dir))
 
+import startup_profile
+
+# --startup-profile: імпорти записуються з цього місця, до важких модулів; воркери рахунків не профілюються
+if "--startup-profile" in sys.argv and not startup_profile.in_child_process():
+    startup_profile.start()
+
 import argparse
+import multiprocessing
 import queue
 import threading
-from datetime import datetime, timedelta
-from typing import Optional
-
-import pytz
-import requests
-
-from config import load_config, save_last_sync, get_language
-from config_server import run_bridge_server_forever, run_config_server_until_received
-from gui import ask_language_at_startup, create_window
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import numpy as np
+
+import deal_arrays
+import deal_store
+import metrics
+import outbox
+import prefetch
+import profiling
+from account_workers import AccountDispatcher, max_parallel_syncs
+from config import (
+    load_account_config,
+    load_config,
+    save_last_sync,
+    get_language,
+    load_upload_checkpoint,
+    save_upload_checkpoint,
+    clear_upload_checkpoint,
+    load_account_state,
+    save_account_state,
+)
+from http_client import choose_content_encoding, close_session, get_session
 from i18n import get_text
-from mt5_sync import connect as mt5_connect, disconnect as mt5_disconnect, get_deals
-
-
-def get_headers(cfg: dict) -> dict:
-    token = (cfg.get("sync_token") or "").strip()
-    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+from ledger import get_ledger
+from positions import (
+    MODE_INSTEAD as POSITIONS_INSTEAD,
+    MODE_OFF as POSITIONS_OFF,
+    aggregate as aggregate_positions,
+    anchors as position_anchors,
+    batch_mask as position_batch_mask,
+    mode as positions_mode,
+    incomplete as incomplete_positions,
+)
+from wire import FORMAT_JSON, choose_format, deals_body
+from mt5_sync import (
+    connect as mt5_connect,
+    disconnect as mt5_disconnect,
+    ensure_connected as mt5_ensure_connected,
+    shutdown as mt5_shutdown,
+    count_deals,
+    get_deals,
+    get_position_deals,
+    get_symbol_info,
+    session as mt5_session,
+)
+
+UPLOAD_BATCH_SIZE = 5000  # угод в одному POST /api/mt5/sync/deals (config.json: upload_batch_size)
 
 
 def get_pending_sync(cfg: dict) -> dict:
     """GET /api/mt5/bridge/pending-sync. Повертає sync_requested, requested_at, last_deal_at, last_deal_ticket."""
+    # requests — з першим зверненням до сервера (http_client імпортує його з першою сесією), не на старті
+    import requests
+
     base = (cfg.get("api_base_url") or "").rstrip("/")
     tid = cfg.get("trading_account_id") or ""
     url = f"{base}/api/mt5/bridge/pending-sync"
     try:
-        r = requests.get(
+        r = get_session(cfg).get(
             url,
             params={"trading_account_id": tid},
-            headers=get_headers(cfg),
             timeout=10,
         )
         if r.status_code != 200:
@@ -51,14 +94,15 @@ def get_pending_sync(cfg: dict) -> dict:
 
 
 def post_bridge_connected(cfg: dict) -> bool:
+    import requests
+
     base = (cfg.get("api_base_url") or "").rstrip("/")
     tid = cfg.get("trading_account_id") or ""
     url = f"{base}/api/mt5/bridge/connected"
     try:
-        r = requests.post(
+        r = get_session(cfg).post(
             url,
             json={"trading_account_id": tid},
-            headers=get_headers(cfg),
             timeout=15,
         )
         if r.status_code != 200:
@@ -100,71 +144,93 @@ def _print_mt5_hint(err: str) -> None:
     print("  • Перевірте логін, інвестор-пароль і сервер у config.json (інвестор-пароль, не основний).")
 
 
-# MT5: type 0 = BUY, 1 = SELL; 2+ = BALANCE, CREDIT, CHARGE тощо — не відправляємо
-def _mt5_deals_to_api(mt5_deals: list) -> list:
-    """Перетворює список угод з MT5 (_asdict()) у формат веб-API. Лише реальні торги (BUY/SELL)."""
-    result = []
-    for d in mt5_deals:
-        deal_type = d.get("type", 0)
-        if deal_type not in (0, 1):
-            continue
-        direction = "BUY" if deal_type == 0 else "SELL"
-        position_id = d.get("position_id")
-        if position_id is None or position_id == 0:
-            position_id = d.get("ticket", 0)
-        try:
-            position_id = int(position_id)
-        except (TypeError, ValueError):
-            position_id = int(d.get("ticket", 0))
-        time_val = d.get("time")
-        if hasattr(time_val, "timestamp"):
-            time_val = int(time_val.timestamp())
-        else:
-            time_val = int(time_val) if time_val is not None else 0
-        result.append({
-            "ticket": d.get("ticket"),
-            "positionId": position_id,
-            "symbol": d.get("symbol", ""),
-            "direction": direction,
-            "profit": float(d.get("profit", 0) or 0),
-            "volume": float(d.get("volume", 0) or 0),
-            "price": float(d.get("price", 0) or 0),
-            "time": time_val,
-            "commission": float(d.get("commission", 0) or 0),
-            "swap": float(d.get("swap", 0) or 0),
-        })
-    return result
+def _mt5_deals_to_api(mt5_deals: np.ndarray) -> np.ndarray:
+    """Перетворює угоди з MT5 (structured array) у колонки веб-API. Лише реальні торги (BUY/SELL)."""
+    return deal_arrays.to_api(mt5_deals)
 
 
-def post_sync_deals(cfg: dict, deals: list) -> bool:
+def _upload_batch_size(cfg: dict) -> int:
+    try:
+        size = int(cfg.get("upload_batch_size") or UPLOAD_BATCH_SIZE)
+    except (TypeError, ValueError):
+        size = UPLOAD_BATCH_SIZE
+    return max(1, size)
+
+
+def post_sync_deals(
+    cfg: dict,
+    deals: np.ndarray,
+    on_batch_sent: Optional[Callable[[np.ndarray], None]] = None,
+    content_encoding: Optional[str] = None,
+    wire_format: str = FORMAT_JSON,
+    positions: Optional[tuple[np.ndarray, np.ndarray]] = None,
+    send_deals: bool = True,
+    symbol_info: Optional[dict] = None,
+) -> bool:
+    """Відправляє угоди пакетами по upload_batch_size; кожен пакет підтверджується окремо (200).
+    on_batch_sent(batch) викликається після кожного підтвердженого пакета (для чекпоінта).
+    content_encoding: gzip | zstd | None — стиснення тіла запиту; wire_format: json | columns | msgpack (wire.py).
+    positions — (позиції, якірні тікети) з positions.py: позиція їде в пакеті зі своїм якірним тікетом.
+    send_deals=False (positions: instead) — у тілі лише позиції; пакет без позицій не надсилається.
+    symbol_info — специфікації символів (get_symbol_info); кожне тіло несе лише свої символи.
+    Тіло генерується потоково (chunked transfer); upload_streaming: false у config.json — одним буфером."""
+    import requests
+
     base = (cfg.get("api_base_url") or "").rstrip("/")
     tid = cfg.get("trading_account_id") or ""
     url = f"{base}/api/mt5/sync/deals"
-    try:
-        r = requests.post(
-            url,
-            json={"trading_account_id": tid, "deals": deals},
-            headers=get_headers(cfg),
-            timeout=60,
+    batch_size = _upload_batch_size(cfg)
+    streaming = cfg.get("upload_streaming", True) is not False
+    for start in range(0, len(deals), batch_size):
+        batch = deals[start:start + batch_size]
+        batch_positions = None
+        if positions is not None:
+            batch_positions = positions[0][position_batch_mask(positions[1], batch)]
+        if not send_deals and (batch_positions is None or len(batch_positions) == 0):
+            # Позиції угод цього пакета поїдуть з пізнішим пакетом — їх рядки агрегують і ці угоди
+            if on_batch_sent is not None:
+                on_batch_sent(batch)
+            continue
+        body = deals_body(
+            wire_format,
+            tid,
+            batch if send_deals else batch[:0],
+            content_encoding=content_encoding,
+            positions=batch_positions,
+            symbol_info=symbol_info,
         )
-        if r.status_code != 200:
-            print(f"Sync deals failed {r.status_code}: {r.text}")
-            return False
-        return True
-    except requests.RequestException as e:
-        print(f"Sync deals request error: {e}")
-        return False
+        headers = {"Content-Type": body.content_type}
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        with metrics.stage("upload_batch") as st:
+            st.deals = len(batch)
+            try:
+                data = body if streaming else body.to_bytes()
+                r = get_session(cfg).post(url, data=data, headers=headers, timeout=60)
+                st.bytes = body.bytes_sent
+                if r.status_code != 200:
+                    st.failed = True
+                    print(f"Sync deals failed {r.status_code}: {r.text}")
+                    return False
+            except requests.RequestException as e:
+                st.failed = True
+                print(f"Sync deals request error: {e}")
+                return False
+        if on_batch_sent is not None:
+            on_batch_sent(batch)
+    return True
 
 
 def post_bridge_sync_done(cfg: dict) -> bool:
+    import requests
+
     base = (cfg.get("api_base_url") or "").rstrip("/")
     tid = cfg.get("trading_account_id") or ""
     url = f"{base}/api/mt5/bridge/sync-done"
     try:
-        r = requests.post(
+        r = get_session(cfg).post(
             url,
             json={"trading_account_id": tid},
-            headers=get_headers(cfg),
             timeout=10,
         )
         return r.status_code == 200
@@ -172,49 +238,430 @@ def post_bridge_sync_done(cfg: dict) -> bool:
         return False
 
 
-def run_sync(cfg: dict) -> tuple[bool, str, int]:
-    """Повертає (success, message, synced_count). Повідомлення в поточній мові."""
+def _terminal(cfg: dict):
+    """mt5_session для рахунку cfg: термінал залогінений під нього на весь блок."""
+    return mt5_session(
+        int(cfg.get("mt5_login") or 0),
+        cfg.get("mt5_password") or "",
+        cfg.get("mt5_server") or "",
+        mt5_path=cfg.get("mt5_path") or None,
+    )
+
+
+def _nothing_new(cfg: dict, tid: str, ledger, to_time: datetime) -> bool:
+    """Швидка перевірка без вибірки вікна: history_deals_total за вікном останнього синку не змінився,
+    остання угода та сама (вибірка лише від її часу — нова угода замість видаленої не ховається за тією ж
+    кількістю) і журнал доставки той самий (не видалений). Помилка або відсутній курсор — повний синк.
+    pending-sync тут не запитується: скидання на сервері без нових угод і без видалення ledger.db
+    видно лише наступному повному синку."""
+    if cfg.get("change_probe", True) is False:
+        return False
+    probe = load_account_state(tid).get("probe")
+    if not isinstance(probe, dict) or "last_ticket" not in probe:
+        return False
+    if ledger.last_time(tid) != probe.get("delivered_time"):
+        return False
+    with _terminal(cfg) as (ok, _):
+        if not ok:
+            return False
+        total = count_deals(datetime.fromtimestamp(int(probe["from"]), timezone.utc), to_time)
+        if total is None or total != probe.get("count"):
+            return False
+        tail = get_deals(datetime.fromtimestamp(int(probe["last_time"]), timezone.utc), to_time)
+    last = deal_arrays.last_deal(tail)
+    return (last[0] if last else 0) == probe["last_ticket"]
+
+
+def _save_probe(
+    cfg: dict,
+    tid: str,
+    ledger,
+    from_time: datetime,
+    to_time: datetime,
+    fetched: Optional[int],
+    last: Optional[tuple[int, int]],
+) -> None:
+    """Курсор для _nothing_new: вікно [from_time, to_time] містило fetched угод (усіх типів, як рахує MT5),
+    last — (тікет, час) останньої з них або None. fetched=None (синк з теплого пакета з іншим початком вікна) —
+    порахувати history_deals_total."""
+    if fetched is None:
+        with _terminal(cfg) as (ok, _):
+            fetched = count_deals(from_time, to_time) if ok else None
+        if fetched is None:
+            save_account_state(tid, probe=None)
+            return
+    save_account_state(tid, probe={
+        "from": int(from_time.timestamp()),
+        "count": fetched,
+        "last_ticket": last[0] if last else 0,
+        "last_time": last[1] if last else int(from_time.timestamp()),
+        "delivered_time": ledger.last_time(tid),
+    })
+
+
+def _post_sync_done_timed(cfg: dict) -> bool:
+    with metrics.stage("sync_done") as st:
+        st.failed = not post_bridge_sync_done(cfg)
+    return not st.failed
+
+
+def _no_progress(stage: str, **counts: int) -> None:
+    pass
+
+
+def _mark_synced(tid: str, to_time: datetime, last_ticket: Optional[int] = None) -> None:
+    """Синк вікна завершено: чекпоінт більше не потрібен, курсор рахунку зсувається на to_time."""
+    clear_upload_checkpoint(tid)
+    save_last_sync(to_time.isoformat())
+    cursor = {"last_sync_at": to_time.isoformat()}
+    if last_ticket is not None:
+        cursor["last_ticket"] = last_ticket
+    save_account_state(tid, **cursor)
+
+
+def run_sync(
+    cfg: dict,
+    progress: Optional[Callable[..., None]] = None,
+    profile: Optional[str] = None,
+) -> tuple[bool, str, int]:
+    """Повертає (success, message, synced_count). Повідомлення в поточній мові.
+    progress(stage, **counts) — етапи для /sync-jobs: connecting, fetching, transforming, uploading.
+    Тривалість, угоди і помилки кожного етапу записуються в metrics (/metrics, /status).
+    profile — шлях звіту без розширення (profiling.report_base): синк під профайлером і tracemalloc.
+    Результат (остання помилка або її відсутність) записується в стан рахунку в state.json."""
+    tid = cfg.get("trading_account_id") or ""
+    with metrics.stage("total") as st:
+        if profile:
+            (success, message, synced), _ = profiling.profile_call(Path(profile), _run_sync, cfg, progress or _no_progress)
+        else:
+            success, message, synced = _run_sync(cfg, progress or _no_progress)
+        st.failed = not success
+        st.deals = synced
+    # Префетч (якщо ввімкнено) тримає наступний пакет цього рахунку напоготові
+    prefetch.watch(cfg)
+    if success:
+        save_account_state(tid, last_error=None, last_error_at=None)
+    else:
+        # Курсор перевірки змін більше не описує доставлений стан — наступний синк повний
+        save_account_state(tid, last_error=message, last_error_at=datetime.now(timezone.utc).isoformat(), probe=None)
+    return success, message, synced
+
+
+def _run_sync(cfg: dict, progress: Callable[..., None]) -> tuple[bool, str, int]:
+    lang = get_language()
+    tid = cfg.get("trading_account_id") or ""
+    replayed = 0
+    if outbox.window(tid) is not None:
+        # Попередній синк не довантажив угоди — спершу вони, до будь-якої нової вибірки з MT5
+        with metrics.stage("replay") as st:
+            delivered, replayed = _replay_outbox(cfg, tid, progress)
+            st.failed = not delivered
+            st.deals = replayed
+        if not delivered:
+            return False, get_text("msg_outbox_failed", lang), replayed
+    success, message, synced = _sync_new_deals(cfg, progress)
+    if replayed and success:
+        return True, get_text("msg_synced_n_deals", lang).format(replayed + synced), replayed + synced
+    return success, message, replayed + synced
+
+
+def _replay_outbox(cfg: dict, tid: str, progress: Callable[..., None]) -> tuple[bool, int]:
+    """Дослати пакети з outbox і закрити їх вікно синку. Кожен пакет — до outbox.REPLAY_ATTEMPTS спроб
+    з подвоєнням паузи. Повертає (усе доставлено, угод відправлено)."""
+    window = outbox.window(tid) or {}
+    ledger = get_ledger()
+    sent = 0
+
+    def on_batch_sent(batch: np.ndarray) -> None:
+        nonlocal sent
+        sent += len(batch)
+        ledger.record(tid, batch["ticket"], batch["time"])
+        progress("uploading", sent=sent)
+
+    progress("uploading", sent=0)
+    for path in outbox.pending(tid):
+        try:
+            batch, batch_positions = outbox.load_batch(path)
+        except (OSError, ValueError) as e:
+            # Пошкоджений файл: вікно не закриваємо — угоди добере звичайний синк (чекпоінт / журнал)
+            print(f"Outbox batch {path.name} is unreadable, falling back to a fresh fetch: {e}")
+            outbox.clear(tid)
+            return True, sent
+        delay = outbox.REPLAY_BACKOFF_SECONDS
+        for attempt in range(outbox.REPLAY_ATTEMPTS):
+            if attempt:
+                time.sleep(delay)
+                delay *= 2
+            # Пакет міг бути підтверджений, але не видалений (обрив після 200) або доставлений частково
+            batch = batch[~ledger.delivered_mask(tid, batch["ticket"], batch["time"])]
+            if post_sync_deals(
+                cfg,
+                batch,
+                on_batch_sent=on_batch_sent,
+                content_encoding=window.get("content_encoding"),
+                wire_format=window.get("format") or FORMAT_JSON,
+                positions=batch_positions,
+                send_deals=window.get("positions") != POSITIONS_INSTEAD,
+                symbol_info=window.get("symbol_info"),
+            ):
+                break
+        else:
+            return False, sent
+        path.unlink(missing_ok=True)
+    if window.get("to_time"):
+        _mark_synced(tid, datetime.fromisoformat(window["to_time"]), window.get("last_ticket"))
+    outbox.finish(tid)
+    return True, sent
+
+
+def _sync_new_deals(cfg: dict, progress: Callable[..., None]) -> tuple[bool, str, int]:
     lang = get_language()
     mt5_login = int(cfg.get("mt5_login") or 0)
     mt5_password = cfg.get("mt5_password") or ""
     mt5_server = cfg.get("mt5_server") or ""
     mt5_path = cfg.get("mt5_path") or ""
 
-    ok, err = mt5_connect(mt5_login, mt5_password, mt5_server, mt5_path=mt5_path or None)
+    progress("connecting")
+    # Термінал лишається підключеним між синками; закривається mt5_shutdown() при зупинці bridge
+    with metrics.stage("connect") as st:
+        ok, err = mt5_ensure_connected(mt5_login, mt5_password, mt5_server, mt5_path=mt5_path or None)
+        st.failed = not ok
     if not ok:
         msg = get_text("msg_mt5_connect_failed", lang).format(err)
         if "-6" in str(err) or "Authorization failed" in str(err):
             msg += get_text("msg_mt5_hint", lang)
         return False, msg, 0
 
-    try:
+    tid = cfg.get("trading_account_id") or ""
+    ledger = get_ledger()
+    to_time = datetime.now(timezone.utc)
+    checkpoint = load_upload_checkpoint(tid)
+    if not checkpoint:
+        with metrics.stage("probe"):
+            unchanged = _nothing_new(cfg, tid, ledger, to_time)
+        if unchanged:
+            # Нових угод у терміналі немає — без pending-sync, вибірки, перетворення і відвантаження
+            _mark_synced(tid, to_time)
+            _post_sync_done_timed(cfg)
+            return True, get_text("msg_no_new_deals", lang), 0
+    with metrics.stage("pending_sync") as st:
         pending = get_pending_sync(cfg)
+        st.failed = not pending  # {} — помилка запиту або не-200
+    content_encoding = choose_content_encoding(cfg, pending)
+    wire_format = choose_format(cfg, pending)
+    if checkpoint:
+        # Попередній синк обірвався — продовжуємо з того ж вікна після останнього підтвердженого тікета
+        from_time = datetime.fromisoformat(checkpoint["from_time"])
+        resume_after = int(checkpoint.get("last_ticket") or 0)
+    else:
         last_deal_at = pending.get("last_deal_at") if isinstance(pending, dict) else None
+        last_delivered = ledger.last_time(tid)
         if last_deal_at and isinstance(last_deal_at, str):
             from_time = datetime.fromisoformat(last_deal_at.replace("Z", "+00:00"))
+        elif last_delivered is not None:
+            # Немає last_deal_at з Next — продовжуємо від останньої доставленої угоди з локального журналу
+            from_time = datetime.fromtimestamp(last_delivered, timezone.utc)
         else:
-            # Немає last_deal_at з Next — тягнемо всі угоди за період
-            from_time = datetime.now(pytz.UTC) - timedelta(days=30)
-        to_time = datetime.now(pytz.UTC)
-        deals = get_deals(from_time, to_time)
-
-        if not deals:
-            save_last_sync(to_time.isoformat())
-            post_bridge_sync_done(cfg)
-            return True, get_text("msg_no_new_deals", lang), 0
+            # Ні last_deal_at, ні журналу — тягнемо всі угоди за період
+            from_time = to_time - timedelta(days=30)
+        resume_after = 0
+    progress("fetching")
+    # Теплий пакет префетчера: з терміналу добираються лише угоди після його останнього оновлення
+    warm = prefetch.take(tid, from_time)
+    with metrics.stage("fetch") as st:
+        with _terminal(cfg) as (ok, err):
+            if ok:
+                deals = get_deals(warm.to_time if warm is not None else from_time, to_time)
+        st.failed = not ok
+        if ok:
+            st.deals = len(deals)
+    if not ok:
+        return False, get_text("msg_mt5_connect_failed", lang).format(err), 0
+    last = deal_arrays.last_deal(deals)
+    if warm is None:
+        fetched = len(deals)
+    else:
+        last = last or warm.last_deal
+        # Вікно синку збігається з вікном пакета — кількість угод MT5 відома без history_deals_total
+        fetched = warm.total + prefetch.count_after(deals, warm.to_time) if from_time == warm.from_time else None
+    progress("transforming", fetched=len(deals) if warm is None else len(warm.deals) + len(deals))
+    with metrics.stage("transform") as st:
+        # Лише тікети, яких сервер ще не підтверджував; сортування за тікетом — чекпоінт
+        # «останній підтверджений тікет» однозначно ділить вибірку
+        api_deals = prefetch.prepare_batch(ledger, tid, deals)
+        if warm is not None:
+            api_deals = prefetch.combine(warm, api_deals, from_time, ledger)
+        if resume_after:
+            api_deals = api_deals[api_deals["ticket"] > resume_after]
+        st.deals = len(api_deals)
+    if len(api_deals) == 0:
+        _mark_synced(tid, to_time)
+        _save_probe(cfg, tid, ledger, from_time, to_time, fetched, last)
+        _post_sync_done_timed(cfg)
+        return True, get_text("msg_no_new_deals", lang), 0
+
+    position_mode = positions_mode(cfg)
+    upload_positions = None
+    if position_mode != POSITIONS_OFF:
+        with metrics.stage("positions") as st:
+            openings = deal_arrays.opening_tickets(deals)
+            if warm is not None:
+                openings = np.union1d(warm.openings, openings)
+            upload_positions, err = _aggregate_positions(cfg, api_deals, openings, to_time)
+            st.failed = upload_positions is None
+        if upload_positions is None:
+            return False, get_text("msg_mt5_connect_failed", lang).format(err), 0
+    symbol_info = None
+    if cfg.get("symbol_info", True) is not False:
+        with metrics.stage("symbols") as st:
+            with _terminal(cfg) as (ok, _):
+                # Без терміналу — відвантаження без специфікацій, а не помилка синку
+                symbol_info = get_symbol_info(np.unique(api_deals["symbol"]).tolist()) if ok else None
+            st.failed = not ok
+
+    sent = 0
+    progress("uploading", total=len(api_deals), sent=0)
+    spooled = _spool(cfg, tid, api_deals, {
+        "from_time": from_time.isoformat(),
+        "to_time": to_time.isoformat(),
+        "last_ticket": int(api_deals["ticket"][-1]),
+        "content_encoding": content_encoding,
+        "format": wire_format,
+        "positions": position_mode,
+        "symbol_info": symbol_info,
+    }, upload_positions)
+
+    def on_batch_sent(batch: np.ndarray) -> None:
+        nonlocal sent
+        sent += len(batch)
+        ledger.record(tid, batch["ticket"], batch["time"])
+        if spooled:
+            outbox.delivered(tid, batch)
+        progress("uploading", sent=sent)
+        save_upload_checkpoint(tid, {
+            "from_time": from_time.isoformat(),
+            "last_ticket": int(batch["ticket"][-1]),
+        })
+
+    with metrics.stage("upload") as st:
+        uploaded = post_sync_deals(
+            cfg,
+            api_deals,
+            on_batch_sent=on_batch_sent,
+            content_encoding=content_encoding,
+            wire_format=wire_format,
+            positions=upload_positions,
+            send_deals=position_mode != POSITIONS_INSTEAD,
+            symbol_info=symbol_info,
+        )
+        st.failed = not uploaded
+        st.deals = sent
+    if not uploaded:
+        if sent:
+            return False, get_text("msg_send_deals_partial", lang).format(sent, len(api_deals)), sent
+        return False, get_text("msg_send_deals_failed", lang), 0
+    if spooled:
+        outbox.finish(tid)
+    _mark_synced(tid, to_time, int(api_deals["ticket"][-1]))
+    _save_probe(cfg, tid, ledger, from_time, to_time, fetched, last)
+    _post_sync_done_timed(cfg)
+    return True, get_text("msg_synced_n_deals", lang).format(len(api_deals)), len(api_deals)
+
+
+def _aggregate_positions(
+    cfg: dict, api_deals: np.ndarray, openings: np.ndarray, to_time: datetime,
+) -> tuple[Optional[tuple[np.ndarray, np.ndarray]], str]:
+    """Позиції угод api_deals і їх якірні тікети. Позиції, відкриті в api_deals (openings — тікети угод відкриття),
+    агрегуються з самого пакета; решта — з їх повної історії до to_time (history_deals_get по позиції): угоди
+    з вікна — лише частина позиції, якщо вона відкрита чи доливалась раніше, частково закривалась до вікна
+    або частина угод уже доставлена. (None, помилка) — термінал недоступний."""
+    missing = incomplete_positions(api_deals, openings)
+    history = api_deals
+    if len(missing):
+        with _terminal(cfg) as (ok, err):
+            fetched = get_position_deals(missing, to_time) if ok else None
+        if fetched is None:
+            return None, str(err or "history_deals_get failed")
+        # api_deals — на випадок угод, яких ще немає в історії терміналу (теплий пакет префетчера)
+        history = np.concatenate([api_deals, deal_arrays.to_api(fetched)])
+        _, first = np.unique(history["ticket"], return_index=True)
+        history = history[first]
+    rows = aggregate_positions(history)
+    return (rows, position_anchors(api_deals, rows)), ""
+
+
+def _spool(
+    cfg: dict,
+    tid: str,
+    api_deals: np.ndarray,
+    window: dict,
+    positions: Optional[tuple[np.ndarray, np.ndarray]] = None,
+) -> bool:
+    """Записати перетворені угоди в outbox перед відвантаженням; помилка диска — відвантаження без outbox."""
+    if not outbox.enabled(cfg):
+        return False
+    try:
+        outbox.spool(tid, api_deals, _upload_batch_size(cfg), window, positions)
+    except OSError as e:
+        print(f"Outbox write failed, uploading without it: {e}")
+        outbox.clear(tid)
+        return False
+    return True
+
+
+def run_export(cfg: dict, export_dir: Optional[str] = None, days: Optional[int] = None) -> tuple[bool, str, int]:
+    """Дописує історію угод рахунку в локальний колонковий архів (deal_store) без звернення до сервера.
+    Вікно: від останньої експортованої угоди; для нового архіву — days днів або вся історія."""
+    mt5_login = int(cfg.get("mt5_login") or 0)
+    ok, err = mt5_ensure_connected(
+        mt5_login,
+        cfg.get("mt5_password") or "",
+        cfg.get("mt5_server") or "",
+        mt5_path=cfg.get("mt5_path") or None,
+    )
+    if not ok:
+        return False, f"MT5 connection failed: {err}", 0
+
+    tid = cfg.get("trading_account_id") or ""
+    store_dir = Path(export_dir) if export_dir else deal_store.default_store_dir(tid)
+    to_time = datetime.now(timezone.utc)
+    last_time = deal_store.last_exported_time(store_dir)
+    if last_time is not None:
+        # Угоди з тією ж секундою могли бути не всі — перекриття прибирає дедуплікація за тікетом
+        from_time = datetime.fromtimestamp(last_time, timezone.utc)
+    elif days:
+        from_time = to_time - timedelta(days=days)
+    else:
+        from_time = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    added = deal_store.append_deals(store_dir, _mt5_deals_to_api(get_deals(from_time, to_time)))
+    return True, f"Exported {added} new deals to {store_dir}", added
 
-        api_deals = _mt5_deals_to_api(deals)
-        if not api_deals:
-            save_last_sync(to_time.isoformat())
-            post_bridge_sync_done(cfg)
-            return True, get_text("msg_no_new_deals", lang), 0
-        if not post_sync_deals(cfg, api_deals):
-            return False, get_text("msg_send_deals_failed", lang), 0
-        save_last_sync(to_time.isoformat())
-        post_bridge_sync_done(cfg)
-        return True, get_text("msg_synced_n_deals", lang).format(len(api_deals)), len(api_deals)
-    finally:
-        mt5_disconnect()
+
+def _start_prefetch(dispatcher: AccountDispatcher) -> None:
+    """Префетч у головному процесі — лише з одним рахунком; з кількома синк (і префетч) іде у воркерах."""
+    if dispatcher.multi_account():
+        dispatcher.release_local_terminal()
+        return
+    try:
+        cfg = load_config()
+    except FileNotFoundError:
+        return
+    prefetch.watch(cfg, refresh_now=True)
+
+
+def _load_cli_config(account_id: Optional[str]) -> dict:
+    """Конфіг рахунку для --sync-only / --export: --account або останній підключений рахунок."""
+    try:
+        cfg = load_config()
+    except FileNotFoundError:
+        print("No config. Run with GUI and connect from browser first.")
+        sys.exit(1)
+    account_id = account_id or cfg.get("trading_account_id") or ""
+    account = load_account_config(account_id)
+    if account is None:
+        print(f"Unknown account: {account_id}")
+        sys.exit(1)
+    return account
 
 
 def main() -> bool:
@@ -230,26 +677,93 @@ def main() -> bool:
         action="store_true",
         help="Only run one sync (fetch deals, POST, sync-done) then exit",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile syncs (cProfile or pyinstrument + tracemalloc); reports go to profiles/ next to state.json",
+    )
+    parser.add_argument(
+        "--account",
+        default=None,
+        help="trading_account_id for --sync-only / --export when config.json has several accounts",
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="Append deal history to a local columnar store (no server calls) then exit",
+    )
+    parser.add_argument(
+        "--export-dir",
+        default=None,
+        help="Directory of the columnar store (default: deals_store/<trading_account_id> next to state.json)",
+    )
+    parser.add_argument(
+        "--export-days",
+        type=int,
+        default=None,
+        help="For a new store: export only the last N days instead of the full history",
+    )
     parser.add_argument(
         "--no-gui",
         action="store_true",
         help="Console only: wait for first /config then exit (for initial setup)",
     )
+    parser.add_argument(
+        "--service",
+        action="store_true",
+        help="Headless: serve /config and /sync-request until stopped, no window; events go to bridge.log",
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Write import timings (python -X importtime format) and startup stages to profiles/ next to state.json",
+    )
     args = parser.parse_args()
+    startup_profile.mark("arguments parsed")
+    try:
+        return _run_mode(args)
+    finally:
+        _save_startup_profile("mode finished")
+
+
+def _save_startup_profile(stage: str) -> None:
+    """Звіт --startup-profile (один раз: GUI пише його перед mainloop, CLI-режими — по завершенні)."""
+    if not startup_profile.active():
+        return
+    startup_profile.mark(stage)
+    path = startup_profile.finish(profiling.report_base("startup"))
+    print(f"Startup profile: {path}")
+
 
+def _run_mode(args: argparse.Namespace) -> bool:
+    """Режим з аргументів командного рядка; True — GUI."""
     if args.sync_only:
-        try:
-            cfg = load_config()
-        except FileNotFoundError:
-            print("No config. Run with GUI and connect from browser first.")
-            sys.exit(1)
-        ok, msg, _ = run_sync(cfg)
+        cfg = _load_cli_config(args.account)
+        profile = profiling.report_base(f"sync-{cfg.get('trading_account_id') or ''}") if args.profile else None
+        ok, msg, _ = run_sync(cfg, profile=str(profile) if profile else None)
+        mt5_shutdown()
+        if profile:
+            print("Profile reports:")
+            for path in profiling.reports_for(profile):
+                print(f"  {path}")
         if not ok:
             print(msg)
             sys.exit(1)
         return False
 
+    if args.export:
+        cfg = _load_cli_config(args.account)
+        ok, msg, _ = run_export(cfg, export_dir=args.export_dir, days=args.export_days)
+        mt5_shutdown()
+        print(msg)
+        if not ok:
+            sys.exit(1)
+        return False
+
+    # Локальний HTTP-сервер (http.server) потрібен лише режимам з /config: --sync-only і --export його не імпортують
     if args.once:
+        from config_server import run_config_server_until_received
+
         try:
             cfg = load_config()
         except FileNotFoundError:
@@ -272,6 +786,8 @@ def main() -> bool:
         return False
 
     if args.no_gui:
+        from config_server import run_config_server_until_received
+
         try:
             cfg = load_config()
         except FileNotFoundError:
@@ -280,9 +796,50 @@ def main() -> bool:
         print("Config present. Use without --no-gui to run with GUI (no polling).")
         return False
 
-    # GUI mode: спочатку вибір мови, потім локальний сервер і вікно
+    if args.service:
+        # Без вікна: лише локальний сервер; лог — у bridge.log з ротацією, tkinter не імпортується
+        import service
+        from config_server import CONFIG_SERVER_HOST, CONFIG_SERVER_PORT
+
+        logger = service.open_log()
+        print(f"Service mode: listening on http://{CONFIG_SERVER_HOST}:{CONFIG_SERVER_PORT}, log: {service.log_path()}")
+        service.redirect_output(logger)
+        log_queue = service.LogQueue(logger)
+        server, dispatcher = _start_bridge(log_queue, profile_syncs=args.profile)
+        lang = get_language()
+        log_queue.put(("log", get_text("log_started", lang)))
+        log_queue.put(("log", get_text("log_enter_credentials", lang)))
+        _save_startup_profile("service ready")
+        try:
+            service.wait_for_stop()
+        finally:
+            log_queue.put(("log", "Service stopping."))
+            _stop_bridge(server, dispatcher)
+        return True  # сервіс — без «Enter для виходу»
+
+    # GUI mode: спочатку вибір мови, потім локальний сервер і вікно; tkinter — лише тут, CLI-режими його не імпортують
+    from gui import ask_language_at_startup, create_window
+
     ask_language_at_startup()
     msg_queue = queue.Queue()
+    server, dispatcher = _start_bridge(msg_queue, profile_syncs=args.profile)
+
+    def on_closing() -> None:
+        _stop_bridge(server, dispatcher)
+
+    root, set_status, append_log = create_window(msg_queue, on_closing=on_closing)
+    lang = get_language()
+    append_log(get_text("log_started", lang))
+    append_log(get_text("log_enter_credentials", lang))
+    _save_startup_profile("window ready")
+    root.mainloop()
+    return True  # GUI mode — не питати Enter після закриття
+
+
+def _start_bridge(msg_queue, profile_syncs: bool = False):
+    """Локальний сервер (/config, /sync-request) з диспетчером рахунків і префетчем для GUI і --service.
+    msg_queue — черга подій вікна або service.LogQueue; повертає (server, dispatcher) для _stop_bridge."""
+    from config_server import run_bridge_server_forever
 
     def on_config_received() -> None:
         lang = get_language()
@@ -299,18 +856,35 @@ def main() -> bool:
                 l = get_language()
                 msg_queue.put(("log", f"{get_text('log_error', l)} {e}"))
         threading.Thread(target=notify_backend, daemon=True).start()
+        _start_prefetch(dispatcher)
 
-    server = run_bridge_server_forever(run_sync, on_config_received, msg_queue)
+    # Кілька рахунків у config.json — синк кожного терміналу в окремому процесі, паралельно
+    dispatcher = AccountDispatcher(run_sync)
+    prefetch.enable()
+    _start_prefetch(dispatcher)
+    try:
+        parallel = max_parallel_syncs(load_config())
+    except FileNotFoundError:
+        parallel = max_parallel_syncs()
+    server = run_bridge_server_forever(
+        dispatcher.run_sync,
+        on_config_received,
+        msg_queue,
+        max_parallel_syncs=parallel,
+        workers_info=dispatcher.workers,
+        profile_syncs=profile_syncs,
+    )
+    return server, dispatcher
 
-    def on_closing() -> None:
-        server.shutdown()
 
-    root, set_status, append_log = create_window(msg_queue, on_closing=on_closing)
-    lang = get_language()
-    append_log(get_text("log_started", lang))
-    append_log(get_text("log_enter_credentials", lang))
-    root.mainloop()
-    return True  # GUI mode — не питати Enter після закриття
+def _stop_bridge(server, dispatcher: AccountDispatcher) -> None:
+    from config_server import stop_bridge_server
+
+    stop_bridge_server(server)
+    prefetch.stop()
+    dispatcher.shutdown()
+    mt5_shutdown()
+    close_session()
 
 
 def _wait_before_exit() -> None:
@@ -322,6 +896,8 @@ def _wait_before_exit() -> None:
 
 
 if __name__ == "__main__":
+    # Воркери рахунків (account_workers) — окремі процеси; у зібраному exe без цього вони перезапускали б main()
+    multiprocessing.freeze_support()
     try:
         used_gui = main()
     except SystemExit as e:
@@ -0,0 +1,236 @@
+"""
+Метрики етапів синку: тривалість, кількість угод і байти тіла (гістограми) та кількість помилок на кожен етап run_sync.
+GET /metrics — формат Prometheus (text exposition 0.0.4); /status — короткий JSON-підсумок.
+Воркери рахунків (account_workers) віддають свої метрики головному процесу через drain() → merge().
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Етапи в порядку виконання run_sync; replay — досилання outbox попереднього синку, probe — перевірка
+# «чи є нові угоди», positions — агрегація позицій, symbols — специфікації символів, upload_batch — окремий POST
+# пакета, total — весь синк;
+# prefetch — фонове оновлення теплого пакета (prefetch.py), поза синком
+STAGES = ("replay", "connect", "probe", "pending_sync", "fetch", "transform", "positions", "symbols", "upload", "upload_batch",
+          "sync_done", "total", "prefetch")
+DEALS_STAGES = ("replay", "fetch", "transform", "upload", "upload_batch", "total", "prefetch")  # етапи, що рахують угоди
+BYTES_STAGES = ("upload_batch",)  # тіло запиту після стиснення
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+DEALS_BUCKETS = (0, 10, 100, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(10))  # 1 KiB … 256 MiB
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_PREFIX = "tradetrack_sync_stage"
+
+
+class Histogram:
+    """Кумулятивна гістограма з фіксованими межами (як у Prometheus): лічильники по кошиках + sum + count."""
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # останній кошик — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оцінка квантиля лінійною інтерполяцією всередині кошика (як histogram_quantile)."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, bound in enumerate(self.buckets):
+            if seen + self.counts[i] >= rank:
+                if self.counts[i] == 0:
+                    return float(bound)
+                return lower + (bound - lower) * (rank - seen) / self.counts[i]
+            seen += self.counts[i]
+            lower = float(bound)
+        return lower  # у +Inf — найбільша відома межа
+
+    def to_dict(self) -> dict:
+        return {"counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    def merge(self, data: dict) -> None:
+        for i, n in enumerate(data["counts"]):
+            self.counts[i] += n
+        self.sum += data["sum"]
+        self.count += data["count"]
+
+
+class StageTimer:
+    """Значення with metrics.stage(...): failed, deals і bytes заповнює код етапу."""
+
+    def __init__(self) -> None:
+        self.failed = False
+        self.deals: Optional[int] = None
+        self.bytes: Optional[int] = None
+
+
+class SyncMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset_locked()
+
+    def _reset_locked(self) -> None:
+        self.durations = {s: Histogram(DURATION_BUCKETS) for s in STAGES}
+        self.deals = {s: Histogram(DEALS_BUCKETS) for s in DEALS_STAGES}
+        self.bytes = {s: Histogram(BYTES_BUCKETS) for s in BYTES_STAGES}
+        self.failures = {s: 0 for s in STAGES}
+        self.last: dict[str, float] = {}
+
+    def observe(
+        self,
+        stage: str,
+        seconds: float,
+        failed: bool = False,
+        deals: Optional[int] = None,
+        nbytes: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            self.durations[stage].observe(seconds)
+            self.last[stage] = seconds
+            if failed:
+                self.failures[stage] += 1
+            if deals is not None and stage in self.deals:
+                self.deals[stage].observe(deals)
+            if nbytes is not None and stage in self.bytes:
+                self.bytes[stage].observe(nbytes)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTimer]:
+        """Заміряти етап; виняток усередині рахується як помилка етапу і прокидається далі."""
+        timer = StageTimer()
+        t0 = time.perf_counter()
+        try:
+            yield timer
+        except BaseException:
+            timer.failed = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - t0, timer.failed, timer.deals, timer.bytes)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return self._snapshot_locked()
+
+    def _snapshot_locked(self) -> dict:
+        return {
+            "durations": {s: h.to_dict() for s, h in self.durations.items()},
+            "deals": {s: h.to_dict() for s, h in self.deals.items()},
+            "bytes": {s: h.to_dict() for s, h in self.bytes.items()},
+            "failures": dict(self.failures),
+            "last": dict(self.last),
+        }
+
+    def drain(self) -> dict:
+        """Знімок і обнулення — воркер передає приріст з моменту попереднього drain()."""
+        with self._lock:
+            data = self._snapshot_locked()
+            self._reset_locked()
+            return data
+
+    def merge(self, data: dict) -> None:
+        with self._lock:
+            for family in ("durations", "deals", "bytes"):
+                target = getattr(self, family)
+                for stage, hist in data[family].items():
+                    if stage in target:
+                        target[stage].merge(hist)
+            for stage, n in data["failures"].items():
+                if stage in self.failures:
+                    self.failures[stage] += n
+            self.last.update(data["last"])
+
+    def summary(self) -> dict:
+        """Для /status: лише етапи, які вже виконувались."""
+        with self._lock:
+            result = {}
+            for stage in STAGES:
+                durations = self.durations[stage]
+                if durations.count == 0:
+                    continue
+                p50, p95 = durations.quantile(0.5), durations.quantile(0.95)
+                item = result[stage] = {
+                    "count": durations.count,
+                    "failures": self.failures[stage],
+                    "avg_seconds": round(durations.sum / durations.count, 6),
+                    "p50_seconds": round(p50, 6),
+                    "p95_seconds": round(p95, 6),
+                    "last_seconds": round(self.last.get(stage, 0.0), 6),
+                }
+                if stage in self.deals:
+                    item["deals"] = int(self.deals[stage].sum)
+                if stage in self.bytes:
+                    item["bytes"] = int(self.bytes[stage].sum)
+            return result
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            lines: list[str] = []
+            families = (
+                ("duration_seconds", "Duration of run_sync stages, seconds", self.durations),
+                ("deals", "Deals handled per stage execution", self.deals),
+                ("bytes", "Request payload bytes per stage execution", self.bytes),
+            )
+            for suffix, help_text, hists in families:
+                name = f"{_PREFIX}_{suffix}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for stage, hist in hists.items():
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f'{name}_bucket{{stage="{stage}",le="{_format_number(bound)}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                    lines.append(f'{name}_sum{{stage="{stage}"}} {_format_number(hist.sum)}')
+                    lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+            name = f"{_PREFIX}_failures_total"
+            lines.append(f"# HELP {name} Failed executions per stage")
+            lines.append(f"# TYPE {name} counter")
+            for stage, n in self.failures.items():
+                lines.append(f'{name}{{stage="{stage}"}} {n}')
+            return "\n".join(lines) + "\n"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_metrics = SyncMetrics()
+
+
+def stage(name: str):
+    return _metrics.stage(name)
+
+
+def observe(stage_name: str, seconds: float, failed: bool = False, deals: Optional[int] = None, nbytes: Optional[int] = None) -> None:
+    _metrics.observe(stage_name, seconds, failed=failed, deals=deals, nbytes=nbytes)
+
+
+def summary() -> dict:
+    return _metrics.summary()
+
+
+def render_prometheus() -> str:
+    return _metrics.render_prometheus()
+
+
+def drain() -> dict:
+    return _metrics.drain()
+
+
+def merge(data: dict) -> None:
+    _metrics.merge(data)
@@ -0,0 +1,236 @@
+"""
+Локальна заглушка TradeTrack API для навантажувального тестування синку:
+GET /api/mt5/bridge/pending-sync, POST /api/mt5/sync/deals, /api/mt5/bridge/sync-done, /api/mt5/bridge/connected.
+Затримка (latency, с) додається до кожної відповіді; bandwidth (байт/с) обмежує швидкість прийому тіла запиту;
+error_rate — частка POST /sync/deals, що отримують 503 (перевірка дозавантаження після збою);
+accept_encodings — кодування тіла (gzip, zstd), які заглушка оголошує в pending-sync;
+accept_formats — колонкові формати тіла угод (columns, msgpack), які заглушка оголошує в pending-sync.
+Тіло /sync/deals приймається в усіх форматах wire.py незалежно від оголошених (за Content-Type).
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_CONTENT_TYPE = "application/vnd.tradetrack.deals-columns+msgpack"
+
+
+class MockApiStats:
+    """Лічильники для звіту навантажувального тесту."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests: dict[str, int] = {}
+        self.bytes_received = 0
+        self.deals_received = 0
+        self.positions_received = 0
+        self.symbols_described: set[str] = set()  # символи, специфікації яких приходили в symbol_info
+        self.last_deal_time: Optional[int] = None
+        self.last_deal_times: dict[str, int] = {}  # trading_account_id → час останньої угоди
+
+    def count(self, path: str, body_len: int) -> None:
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            self.bytes_received += body_len
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "bytes_received": self.bytes_received,
+                "deals_received": self.deals_received,
+                "positions_received": self.positions_received,
+                "symbols_described": len(self.symbols_described),
+                "last_deal_time": self.last_deal_time,
+            }
+
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки і тіло відповіді — окремі write: без TCP_NODELAY Nagle + delayed ACK клієнта дають ~40 мс на запит keep-alive
+    disable_nagle_algorithm = True
+    latency: float = 0.0
+    bandwidth: int = 0  # байт/с, 0 — без обмеження
+    track_last_deal: bool = True
+    error_rate: float = 0.0
+    accept_encodings: tuple = ()
+    accept_formats: tuple = ()
+    stats: MockApiStats = MockApiStats()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _read_chunked(self) -> bytes:
+        parts = []
+        while True:
+            size = int(self.rfile.readline().split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # trailer до порожнього рядка
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(parts)
+            parts.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _read_body(self) -> bytes:
+        if "chunked" in (self.headers.get("Transfer-Encoding") or "").lower():
+            body = self._read_chunked()
+        else:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length) if length else b""
+        if self.bandwidth > 0 and body:
+            time.sleep(len(body) / self.bandwidth)
+        return body
+
+    def _decode_body(self, body: bytes) -> bytes:
+        encoding = (self.headers.get("Content-Encoding") or "").strip().lower()
+        if encoding == "gzip":
+            return gzip.decompress(body)
+        if encoding == "zstd" and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        if encoding in ("", "identity"):
+            return body
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+    def _parse_deals(self, raw: bytes) -> tuple[int, list[int], str, int, list[str]]:
+        """Тіло /sync/deals будь-якого формату →
+        (кількість угод, часи угод, trading_account_id, кількість позицій, символи з symbol_info)."""
+        content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+        if content_type == MSGPACK_CONTENT_TYPE:
+            if msgpack is None:
+                raise ValueError("msgpack is not installed")
+            data = msgpack.unpackb(raw, raw=False)
+        else:
+            data = json.loads(raw.decode("utf-8"))
+        account_id = str(data.get("trading_account_id") or "")
+        described = list(data.get("symbol_info") or {})
+        if data.get("format") == "columns":
+            symbols = data["symbols"]
+            count = self._check_columns(data["deals"], int(data["count"]), symbols)
+            position_count = 0
+            if "positions" in data:
+                position_count = self._check_columns(data["positions"], int(data["position_count"]), symbols)
+            times = [t for t in data["deals"]["time"] if isinstance(t, int)]
+            return count, times, account_id, position_count, described
+        deals = data.get("deals") or []
+        times = [d.get("time") for d in deals if isinstance(d.get("time"), int)]
+        return len(deals), times, account_id, len(data.get("positions") or []), described
+
+    @staticmethod
+    def _check_columns(columns: dict, count: int, symbols: list) -> int:
+        if any(len(values) != count for values in columns.values()):
+            raise ValueError("Column lengths do not match count")
+        if any(not 0 <= code < len(symbols) for code in columns["symbol"]):
+            raise ValueError("Symbol code out of range")
+        return count
+
+    def _send_json(self, code: int, obj: dict) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        return self.headers.get("Authorization", "").startswith("Bearer ")
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        self.stats.count(path, 0)
+        if not self._authorized():
+            self._send_json(401, {"error": "Unauthorized"})
+            return
+        if path == "/api/mt5/bridge/pending-sync":
+            account_id = parse_qs(urlparse(self.path).query).get("trading_account_id", [""])[0]
+            with self.stats.lock:
+                last = self.stats.last_deal_times.get(account_id) if self.track_last_deal else None
+            self._send_json(200, {
+                "sync_requested": True,
+                "requested_at": datetime.now(timezone.utc).isoformat(),
+                "last_deal_at": datetime.fromtimestamp(last, timezone.utc).isoformat() if last else None,
+                "last_deal_ticket": None,
+                "accept_encodings": list(self.accept_encodings),
+                "accept_formats": list(self.accept_formats),
+            })
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        path = urlparse(self.path).path
+        body = self._read_body()
+        self.stats.count(path, len(body))
+        if not self._authorized():
+            self._send_json(401, {"error": "Unauthorized"})
+            return
+        if path == "/api/mt5/sync/deals":
+            if self.error_rate > 0 and random.random() < self.error_rate:
+                self._send_json(503, {"error": "Service unavailable (mock)"})
+                return
+            try:
+                count, times, account_id, position_count, described = self._parse_deals(self._decode_body(body))
+            except Exception as e:  # битий JSON або стиснення — 400, як на реальному сервері
+                self._send_json(400, {"error": str(e)})
+                return
+            with self.stats.lock:
+                self.stats.deals_received += count
+                self.stats.positions_received += position_count
+                self.stats.symbols_described.update(described)
+                if times:
+                    latest = max(times)
+                    previous = self.stats.last_deal_times.get(account_id)
+                    if previous is None or latest > previous:
+                        self.stats.last_deal_times[account_id] = latest
+                    if self.stats.last_deal_time is None or latest > self.stats.last_deal_time:
+                        self.stats.last_deal_time = latest
+            self._send_json(200, {"ok": True, "received": count, "positions": position_count})
+        elif path in ("/api/mt5/bridge/sync-done", "/api/mt5/bridge/connected"):
+            self._send_json(200, {"ok": True})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+
+def run_mock_api(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.0,
+    bandwidth: int = 0,
+    track_last_deal: bool = True,
+    error_rate: float = 0.0,
+    accept_encodings: tuple = (),
+    accept_formats: tuple = (),
+) -> ThreadingHTTPServer:
+    """Запустити заглушку у фоні (port=0 — вільний порт). server.stats — лічильники, server.url — базовий URL."""
+    stats = MockApiStats()
+    handler = type("BoundMockApiHandler", (MockApiHandler,), {
+        "latency": latency,
+        "bandwidth": bandwidth,
+        "track_last_deal": track_last_deal,
+        "error_rate": error_rate,
+        "accept_encodings": tuple(accept_encodings),
+        "accept_formats": tuple(accept_formats),
+        "stats": stats,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
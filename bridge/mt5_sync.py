@@ -1,15 +1,58 @@
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
-import pytz
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import ModuleType
+from typing import Iterable, Iterator, Tuple, Optional
+import numpy as np
 
-try:
-    import MetaTrader5 as mt5
-    MT5_AVAILABLE = True
-except ImportError:
-    MT5_AVAILABLE = False
-    mt5 = None
+from deal_arrays import empty_mt5, from_mt5
+
+# Модуль терміналу (MetaTrader5 або fake_mt5) імпортується з першим зверненням до MT5 (_backend), а не при імпорті:
+# режими без терміналу (--export, старт GUI і локального сервера) його не чекають
+mt5: Optional[ModuleType] = None
+MT5_AVAILABLE = False
+_backend_loaded = False
 
 MT5_TIMEOUT_MS = 30000
+SYMBOL_CACHE_SIZE = 512  # символів у кеші symbol_info (LRU), скидається з кожною новою сесією
+
+# Сесія терміналу між синками: API MetaTrader5 — один термінал на процес і не потокобезпечний
+_lock = threading.RLock()
+_session: Optional[dict] = None  # {"path", "login", "password", "server"} поточного підключення
+
+
+def _backend() -> Optional[ModuleType]:
+    """Модуль терміналу, імпортований при першому виклику; None — MT5 недоступний.
+    TRADETRACK_MT5_BACKEND=fake — емуляція терміналу (fake_mt5) для навантажувальних тестів без MT5."""
+    global mt5, MT5_AVAILABLE, _backend_loaded
+    if _backend_loaded:
+        return mt5
+    with _lock:
+        if not _backend_loaded:
+            if os.environ.get("TRADETRACK_MT5_BACKEND", "").strip().lower() == "fake":
+                import fake_mt5 as backend
+            else:
+                try:
+                    import MetaTrader5 as backend
+                except ImportError:
+                    backend = None
+            mt5 = backend
+            MT5_AVAILABLE = backend is not None
+            _backend_loaded = True
+    return mt5
+
+
+def use_backend(backend: Optional[ModuleType]) -> None:
+    """Підмінити модуль MetaTrader5 (наприклад fake_mt5); None — вимкнути MT5."""
+    global mt5, MT5_AVAILABLE, _session, _backend_loaded
+    with _lock:
+        mt5 = backend
+        MT5_AVAILABLE = backend is not None
+        _backend_loaded = True
+        _session = None
+        _symbol_info.cache_clear()
 
 
 def connect(
@@ -19,7 +62,7 @@ def connect(
     mt5_path: Optional[str] = None,
     timeout: int = MT5_TIMEOUT_MS,
 ) -> Tuple[bool, Optional[str]]:
-    if not MT5_AVAILABLE:
+    if _backend() is None:
         return False, "MetaTrader5 is not installed (Windows only)."
     init_kwargs: dict = {"timeout": timeout}
     if mt5_path and str(mt5_path).strip():
@@ -34,17 +77,157 @@ def connect(
 
 
 def disconnect() -> None:
-    if MT5_AVAILABLE and mt5:
+    if mt5 is not None:
         mt5.shutdown()
 
 
-def get_deals(from_time: datetime, to_time: datetime) -> List[Dict]:
-    if not MT5_AVAILABLE or mt5 is None:
-        return []
-    tz = pytz.UTC
-    from_t = from_time if from_time.tzinfo else tz.localize(from_time)
-    to_t = to_time if to_time.tzinfo else tz.localize(to_time)
-    deals = mt5.history_deals_get(from_t, to_t)
+def _session_alive(login: int) -> bool:
+    """Дешева перевірка: термінал на зв'язку і залогінений під тим самим рахунком."""
+    terminal = mt5.terminal_info()
+    if terminal is None or not getattr(terminal, "connected", True):
+        return False
+    account = mt5.account_info()
+    return account is not None and int(getattr(account, "login", login)) == login
+
+
+def ensure_connected(
+    mt5_login: int,
+    mt5_password: str,
+    mt5_server: str,
+    mt5_path: Optional[str] = None,
+    timeout: int = MT5_TIMEOUT_MS,
+) -> Tuple[bool, Optional[str]]:
+    """Як connect, але тримає термінал підключеним між синками.
+    Живу сесію перевикористовує; при зміні логіна/пароля/сервера — лише повторний login;
+    якщо термінал відпав або змінився mt5_path — повне перепідключення."""
+    global _session
+    path = str(mt5_path).strip() if mt5_path and str(mt5_path).strip() else None
+    creds = {"login": mt5_login, "password": mt5_password, "server": mt5_server}
+    with _lock:
+        if _session is not None and _session["path"] == path and _session_alive(_session["login"]):
+            if all(_session[k] == v for k, v in creds.items()):
+                return True, None
+            # Інший рахунок або сервер — специфікації символів можуть відрізнятися
+            _symbol_info.cache_clear()
+            if mt5.login(mt5_login, password=mt5_password, server=mt5_server):
+                _session.update(creds)
+                return True, None
+        if _session is not None:
+            disconnect()
+            _session = None
+        _symbol_info.cache_clear()
+        ok, err = connect(mt5_login, mt5_password, mt5_server, mt5_path=path, timeout=timeout)
+        if ok:
+            _session = {"path": path, **creds}
+        return ok, err
+
+
+@contextmanager
+def session(
+    mt5_login: int,
+    mt5_password: str,
+    mt5_server: str,
+    mt5_path: Optional[str] = None,
+    timeout: int = MT5_TIMEOUT_MS,
+) -> Iterator[Tuple[bool, Optional[str]]]:
+    """ensure_connected + тримати термінал за цим рахунком до кінця блоку: інший потік процесу
+    (префетчер, синк іншого рахунку на тому ж терміналі) не перелогінить його між підключенням і вибіркою."""
+    with _lock:
+        yield ensure_connected(mt5_login, mt5_password, mt5_server, mt5_path=mt5_path, timeout=timeout)
+
+
+def shutdown() -> None:
+    """Закрити сесію ensure_connected (при зупинці bridge)."""
+    global _session
+    with _lock:
+        if _session is not None:
+            disconnect()
+        _session = None
+        _symbol_info.cache_clear()
+
+
+def get_deals(from_time: datetime, to_time: datetime) -> np.ndarray:
+    """Угоди за період як один structured array (колонки TradeDeal)."""
+    if _backend() is None:
+        return empty_mt5()
+    from_t = from_time if from_time.tzinfo else from_time.replace(tzinfo=timezone.utc)
+    to_t = to_time if to_time.tzinfo else to_time.replace(tzinfo=timezone.utc)
+    with _lock:
+        deals = mt5.history_deals_get(from_t, to_t)
     if deals is None:
-        return []
-    return [d._asdict() for d in deals]
+        return empty_mt5()
+    return from_mt5(deals)
+
+
+def get_position_deals(position_ids: np.ndarray, to_time: datetime) -> Optional[np.ndarray]:
+    """Усі угоди позицій position_ids до to_time одним structured array: history_deals_get(position=...) лише
+    для цих позицій, без вибірки всієї історії рахунку. None — MT5 недоступний або помилка вибірки."""
+    if _backend() is None:
+        return None
+    deals: list = []
+    with _lock:
+        for position_id in position_ids.tolist():
+            found = mt5.history_deals_get(position=int(position_id))
+            if found is None:
+                return None
+            deals.extend(found)
+    if not deals:
+        return empty_mt5()
+    history = from_mt5(tuple(deals))
+    to_t = to_time if to_time.tzinfo else to_time.replace(tzinfo=timezone.utc)
+    return history[history["time"] <= int(to_t.timestamp())]
+
+
+def count_deals(from_time: datetime, to_time: datetime) -> Optional[int]:
+    """Кількість угод за період (history_deals_total) — без вибірки самих угод. None — MT5 недоступний або помилка."""
+    if _backend() is None:
+        return None
+    from_t = from_time if from_time.tzinfo else from_time.replace(tzinfo=timezone.utc)
+    to_t = to_time if to_time.tzinfo else to_time.replace(tzinfo=timezone.utc)
+    with _lock:
+        total = mt5.history_deals_total(from_t, to_t)
+    if total is None or total < 0:
+        return None
+    return int(total)
+
+
+@lru_cache(maxsize=SYMBOL_CACHE_SIZE)
+def _symbol_info(symbol: str) -> dict:
+    """Специфікація символу з терміналу (у форматі API). KeyError — символу немає / MT5 недоступний:
+    lru_cache не кешує винятки, тож разовий збій symbol_info не ховає символ до кінця сесії."""
+    if _backend() is None:
+        raise KeyError(symbol)
+    with _lock:
+        info = mt5.symbol_info(symbol)
+    if info is None:
+        raise KeyError(symbol)
+    digits = int(info.digits)
+    point = float(info.point)
+    tick_size = float(info.trade_tick_size) or point
+    tick_value = float(info.trade_tick_value)
+    # Піпс — 10 пунктів для котирувань з 3/5 знаками, інакше пункт
+    pip_size = point * 10 if digits in (3, 5) else point
+    return {
+        "digits": digits,
+        "point": point,
+        "contractSize": float(info.trade_contract_size),
+        "tickSize": tick_size,
+        "tickValue": tick_value,
+        "pipSize": pip_size,
+        "pipValue": tick_value * pip_size / tick_size if tick_size else 0.0,
+        "currencyBase": info.currency_base,
+        "currencyProfit": info.currency_profit,
+    }
+
+
+def get_symbol_info(symbols: Iterable[str]) -> dict[str, dict]:
+    """Специфікації символів (LRU-кеш на сесію терміналу): один виклик symbol_info на новий символ, а не на угоду.
+    Символи, яких термінал не знає, пропускаються і запитуються знову з наступним синком."""
+    result = {}
+    for symbol in symbols:
+        if symbol and symbol not in result:
+            try:
+                result[symbol] = _symbol_info(symbol)
+            except KeyError:
+                continue
+    return result
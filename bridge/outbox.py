@@ -0,0 +1,138 @@
+"""
+Черга відвантаження на диску (config.json: outbox): перетворені угоди пишуться пакетами в outbox/<рахунок>/
+перед відправкою, файл пакета видаляється лише після 200 від сервера. Після мережевої помилки або 5xx
+наступний синк спершу досилає збережені пакети (з паузами між спробами) — без повторної вибірки з MT5.
+window.json пишеться останнім: пакети без нього — незавершений запис, вони відкидаються.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import config
+from deal_arrays import API_DEAL_DTYPE
+from positions import POSITION_DTYPE, batch_mask
+
+OUTBOX_DIRNAME = "outbox"
+WINDOW_NAME = "window.json"
+BATCH_SUFFIX = ".npz"
+REPLAY_ATTEMPTS = 3  # спроб на пакет під час досилання
+REPLAY_BACKOFF_SECONDS = 1.0  # пауза перед другою спробою; далі подвоюється
+
+
+def enabled(cfg: dict) -> bool:
+    return cfg.get("outbox", True) is not False
+
+
+def outbox_dir(trading_account_id: str) -> Path:
+    """outbox/<trading_account_id> поруч зі state.json."""
+    return config.STATE_PATH.parent / OUTBOX_DIRNAME / (trading_account_id or "default")
+
+
+def _batch_path(directory: Path, batch: np.ndarray) -> Path:
+    # Ім'я — перший тікет пакета: сортування імен = порядок відправки
+    return directory / f"{int(batch['ticket'][0]):020d}{BATCH_SUFFIX}"
+
+
+def _columns(rows: np.ndarray, prefix: str = "") -> dict[str, np.ndarray]:
+    """Колонки без pickle: symbol — коди + словник символів (як у deal_store)."""
+    symbols, codes = np.unique(rows["symbol"].astype(str), return_inverse=True)
+    columns = {f"{prefix}{name}": rows[name] for name in rows.dtype.names if name != "symbol"}
+    columns[f"{prefix}symbols"] = symbols
+    columns[f"{prefix}symbol_codes"] = codes.astype("<i4")
+    return columns
+
+
+def _rows(data, dtype: np.dtype, prefix: str = "") -> np.ndarray:
+    rows = np.empty(len(data[f"{prefix}symbol_codes"]), dtype=dtype)
+    for name in dtype.names:
+        if name != "symbol":
+            rows[name] = data[f"{prefix}{name}"]
+    rows["symbol"] = data[f"{prefix}symbols"].astype(object)[data[f"{prefix}symbol_codes"]]
+    return rows
+
+
+def _write_batch(path: Path, batch: np.ndarray, batch_positions: Optional[tuple[np.ndarray, np.ndarray]]) -> None:
+    columns = _columns(batch)
+    if batch_positions is not None:
+        rows, anchors = batch_positions
+        columns.update(_columns(rows, "position_"))
+        columns["position_anchors"] = anchors
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **columns)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_batch(path: Path) -> tuple[np.ndarray, Optional[tuple[np.ndarray, np.ndarray]]]:
+    """(угоди пакета, (позиції пакета, їх якірні тікети) або None — пакет без позицій)."""
+    with np.load(path, allow_pickle=False) as data:
+        batch = _rows(data, API_DEAL_DTYPE)
+        batch_positions = None
+        if "position_anchors" in data.files:
+            batch_positions = (_rows(data, POSITION_DTYPE, "position_"), data["position_anchors"])
+    return batch, batch_positions
+
+
+def spool(
+    trading_account_id: str,
+    deals: np.ndarray,
+    batch_size: int,
+    window: dict,
+    positions: Optional[tuple[np.ndarray, np.ndarray]] = None,
+) -> None:
+    """Записати deals пакетами по batch_size (ті самі межі, що й у post_sync_deals) і window.json вікна синку.
+    positions — (позиції, якірні тікети): кожен пакет зберігає позиції, що відвантажуються з ним."""
+    directory = outbox_dir(trading_account_id)
+    clear(trading_account_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    for start in range(0, len(deals), batch_size):
+        batch = deals[start:start + batch_size]
+        batch_positions = None
+        if positions is not None:
+            mask = batch_mask(positions[1], batch)
+            batch_positions = (positions[0][mask], positions[1][mask])
+        _write_batch(_batch_path(directory, batch), batch, batch_positions)
+    config.write_json_atomic(directory / WINDOW_NAME, window)
+
+
+def window(trading_account_id: str) -> Optional[dict]:
+    path = outbox_dir(trading_account_id) / WINDOW_NAME
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def pending(trading_account_id: str) -> list[Path]:
+    """Ще не підтверджені пакети в порядку тікетів; незавершений запис (без window.json) прибирається."""
+    directory = outbox_dir(trading_account_id)
+    if not directory.exists():
+        return []
+    if window(trading_account_id) is None:
+        clear(trading_account_id)
+        return []
+    return sorted(directory.glob(f"*{BATCH_SUFFIX}"))
+
+
+def delivered(trading_account_id: str, batch: np.ndarray) -> None:
+    """Сервер підтвердив пакет — видалити його файл."""
+    try:
+        _batch_path(outbox_dir(trading_account_id), batch).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def finish(trading_account_id: str) -> None:
+    """Усі пакети вікна доставлено."""
+    clear(trading_account_id)
+
+
+def clear(trading_account_id: str) -> None:
+    shutil.rmtree(outbox_dir(trading_account_id), ignore_errors=True)
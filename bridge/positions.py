@@ -0,0 +1,141 @@
+"""
+Агрегація угод у позиції перед відвантаженням (config.json: positions): групування за positionId сортуванням
+(lexsort + reduceat, без циклу Python по угодах) — середньозважені ціни входу/виходу, обсяги, прибуток з комісією
+і свопом, час відкриття/закриття. Сервер отримує готові позиції разом з угодами або замість них.
+"""
+from typing import Optional
+
+import numpy as np
+
+from deal_arrays import DIRECTIONS
+
+DEAL_ENTRY_IN = 0  # OUT (1), INOUT (2, розворот) і OUT_BY (3) рахуються виходом
+
+MODE_OFF = "off"
+MODE_ALONGSIDE = "alongside"
+MODE_INSTEAD = "instead"
+MODES = (MODE_OFF, MODE_ALONGSIDE, MODE_INSTEAD)
+
+POSITION_DTYPE = np.dtype([
+    ("positionId", "i8"),
+    ("symbol", object),
+    ("direction", "i1"),  # напрям першої угоди входу: 0 = BUY, 1 = SELL
+    ("volume", "f8"),  # обсяг угод входу
+    ("closedVolume", "f8"),  # обсяг угод виходу
+    ("entryPrice", "f8"),  # VWAP угод входу
+    ("exitPrice", "f8"),  # VWAP угод виходу; NaN — виходів ще не було
+    ("profit", "f8"),
+    ("commission", "f8"),
+    ("swap", "f8"),
+    ("netProfit", "f8"),  # profit + commission + swap
+    ("openTime", "i8"),
+    ("closeTime", "i8"),  # час останньої угоди виходу; 0 — виходів ще не було
+    ("closed", "?"),  # closedVolume покриває volume
+    ("deals", "i4"),
+])
+
+VOLUME_EPSILON = 1e-9
+
+
+def mode(cfg: dict) -> str:
+    value = str(cfg.get("positions") or MODE_OFF).strip().lower()
+    return value if value in MODES else MODE_OFF
+
+
+def incomplete(api_deals: np.ndarray, openings: np.ndarray) -> np.ndarray:
+    """positionId позицій api_deals, угоди відкриття яких у api_deals немає (openings — тікети угод відкриття,
+    deal_arrays.opening_tickets). Такі позиції агрегуються з історії терміналу: частина їх угод лежить поза
+    api_deals — доливки чи часткові закриття до початку вікна синку, угоди, уже доставлені попередніми синками
+    (журнал), чи відрізані чекпоінтом відвантаження. Позиція, відкрита в api_deals, вся в ньому: решта її угод пізніші."""
+    if len(api_deals) == 0:
+        return np.empty(0, dtype="i8")
+    opened = api_deals["positionId"][np.isin(api_deals["ticket"], openings)]
+    return np.setdiff1d(api_deals["positionId"], opened)
+
+
+def aggregate(api_deals: np.ndarray) -> np.ndarray:
+    """Угоди (API_DEAL_DTYPE, без дублікатів тікетів) → по рядку POSITION_DTYPE на positionId, за зростанням positionId."""
+    if len(api_deals) == 0:
+        return np.empty(0, dtype=POSITION_DTYPE)
+    # Сортування — лише перестановка; колонки вибираються за нею поштучно (без копії всього масиву з object-колонкою)
+    order = np.lexsort((api_deals["ticket"], api_deals["time"], api_deals["positionId"]))
+    position_id = api_deals["positionId"][order]
+    starts = np.flatnonzero(np.r_[True, position_id[1:] != position_id[:-1]])
+    n = len(order)
+    is_in = api_deals["entry"][order] == DEAL_ENTRY_IN
+    volume = api_deals["volume"][order]
+    notional = volume * api_deals["price"][order]
+    times = api_deals["time"][order]
+
+    in_volume = np.add.reduceat(np.where(is_in, volume, 0.0), starts)
+    out_volume = np.add.reduceat(np.where(is_in, 0.0, volume), starts)
+    in_notional = np.add.reduceat(np.where(is_in, notional, 0.0), starts)
+    out_notional = np.add.reduceat(np.where(is_in, 0.0, notional), starts)
+    # Перша угода входу групи; якщо входу немає (історія неповна) — перша угода групи з протилежним напрямом
+    first_in = np.minimum.reduceat(np.where(is_in, np.arange(n), n), starts)
+    has_in = first_in < n
+    first = np.where(has_in, first_in, starts)
+    first_deal = order[first]
+
+    # zeros, а не empty: для dtype з object-полем empty в рази повільніший
+    out = np.zeros(len(starts), dtype=POSITION_DTYPE)
+    out["positionId"] = position_id[starts]
+    out["symbol"] = api_deals["symbol"][first_deal]
+    direction = api_deals["direction"][first_deal]
+    out["direction"] = np.where(has_in, direction, 1 - direction)
+    out["volume"] = in_volume
+    out["closedVolume"] = out_volume
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["entryPrice"] = np.where(in_volume > 0, in_notional / in_volume, np.nan)
+        out["exitPrice"] = np.where(out_volume > 0, out_notional / out_volume, np.nan)
+    for name in ("profit", "commission", "swap"):
+        out[name] = np.add.reduceat(api_deals[name][order], starts)
+    out["netProfit"] = out["profit"] + out["commission"] + out["swap"]
+    out["openTime"] = times[first]
+    out["closeTime"] = np.maximum.reduceat(np.where(is_in, 0, times), starts)
+    out["closed"] = (out_volume > 0) & (out_volume >= in_volume - VOLUME_EPSILON)
+    out["deals"] = np.diff(np.r_[starts, n])
+    return out
+
+
+def anchors(api_deals: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Для кожної позиції — найбільший тікет її угод серед api_deals (що відвантажуються; -1 — немає).
+    Позиція їде з пакетом, у якому цей тікет: коли сервер підтвердив пакет, підтверджені й усі її угоди."""
+    result = np.full(len(positions), -1, dtype="i8")
+    if len(api_deals) == 0 or len(positions) == 0:
+        return result
+    order = np.lexsort((api_deals["ticket"], api_deals["positionId"]))
+    position_id = api_deals["positionId"][order]
+    ends = np.flatnonzero(np.r_[position_id[1:] != position_id[:-1], True])
+    idx = np.searchsorted(positions["positionId"], position_id[ends])
+    result[idx] = api_deals["ticket"][order][ends]
+    return result
+
+
+def batch_mask(position_anchors: np.ndarray, batch: np.ndarray) -> np.ndarray:
+    """Маска позицій, чий якірний тікет потрапив у пакет."""
+    return np.isin(position_anchors, batch["ticket"])
+
+
+def to_records(positions: np.ndarray) -> list[dict]:
+    """Межа серіалізації: POSITION_DTYPE → список dict для JSON (direction рядком, NaN → null)."""
+    columns = record_columns(positions)
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def record_columns(positions: np.ndarray, symbol_codes: Optional[np.ndarray] = None) -> dict[str, list]:
+    """Колонки позицій як списки Python; symbol_codes — коди в словнику символів тіла замість назв, direction 0/1."""
+    columns = {}
+    for name in POSITION_DTYPE.names:
+        values = positions[name]
+        if name == "symbol" and symbol_codes is not None:
+            columns[name] = symbol_codes.tolist()
+        elif name == "direction" and symbol_codes is None:
+            columns[name] = np.array(DIRECTIONS, dtype=object)[values].tolist()
+        elif values.dtype.kind == "f" and np.isnan(values).any():
+            # NaN у JSON недопустимий (allow_nan=False) — null
+            columns[name] = [None if v != v else v for v in values.tolist()]
+        else:
+            columns[name] = values.tolist()
+    return columns
@@ -0,0 +1,209 @@
+"""
+Фонова попередня вибірка (config.json: prefetch): поки bridge чекає кнопку на сайті, угоди, яких ще немає
+в журналі доставки, заздалегідь вибираються з терміналу і перетворюються в колонки API («теплий» пакет).
+/sync-request тоді добирає лише угоди після останнього оновлення і одразу відвантажує.
+Працює тільки з локальним терміналом — сервер TradeTrack не опитується.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+
+import metrics
+from config import load_upload_checkpoint
+from deal_arrays import last_deal, opening_tickets, to_api
+from ledger import DealLedger, get_ledger
+from mt5_sync import get_deals, session
+
+PREFETCH_INTERVAL_SECONDS = 60.0  # config.json: prefetch_interval_seconds
+MIN_INTERVAL_SECONDS = 5.0
+DEFAULT_WINDOW_DAYS = 30  # як у run_sync, коли немає ні last_deal_at, ні журналу
+
+
+class WarmBatch:
+    """Угоди рахунку з вікна [from_time, to_time], ще не доставлені на момент оновлення (колонки API, за тікетом).
+    total — усі угоди MT5 у вікні (як history_deals_total), для курсора перевірки змін;
+    openings — тікети угод відкриття позицій серед deals (deal_arrays.opening_tickets), для агрегації позицій;
+    last_deal — (тікет, час) останньої угоди MT5 у вікні (deal_arrays.last_deal), теж для курсора."""
+
+    def __init__(
+        self,
+        account_id: str,
+        from_time: datetime,
+        to_time: datetime,
+        deals: np.ndarray,
+        total: int,
+        openings: np.ndarray,
+        last_deal: Optional[tuple[int, int]],
+    ) -> None:
+        self.account_id = account_id
+        self.from_time = from_time
+        self.to_time = to_time
+        self.deals = deals
+        self.total = total
+        self.openings = openings
+        self.last_deal = last_deal
+
+
+def prepare_batch(ledger: DealLedger, account_id: str, mt5_deals: np.ndarray) -> np.ndarray:
+    """Угоди MT5 → недоставлені угоди у колонках API, відсортовані за тікетом."""
+    mt5_deals = mt5_deals[~ledger.delivered_mask(account_id, mt5_deals["ticket"], mt5_deals["time"])]
+    api_deals = to_api(mt5_deals)
+    return api_deals[np.argsort(api_deals["ticket"], kind="stable")]
+
+
+def count_after(mt5_deals: np.ndarray, boundary: datetime) -> int:
+    """Угоди MT5 пізніше секунди boundary. Вибірка з boundary включає угоди цієї секунди, які вже є в пакеті;
+    їх не рахуємо — кількість може лише недорахувати (пізні угоди тієї ж секунди), і тоді курсор перевірки змін
+    не збігається і наступний синк повний, а не пропускає нові угоди."""
+    return int(np.count_nonzero(mt5_deals["time"] > int(boundary.timestamp())))
+
+
+def combine(warm: WarmBatch, delta: np.ndarray, from_time: datetime, ledger: DealLedger) -> np.ndarray:
+    """Теплий пакет (з from_time) + добрані угоди: без дублікатів тікетів і без доставлених після оновлення."""
+    kept = warm.deals[warm.deals["time"] >= int(from_time.timestamp())]
+    merged = np.concatenate([kept, delta]) if len(delta) else kept
+    _, first = np.unique(merged["ticket"], return_index=True)  # відсортовано за тікетом
+    merged = merged[first]
+    return merged[~ledger.delivered_mask(warm.account_id, merged["ticket"], merged["time"])]
+
+
+_lock = threading.Lock()
+_enabled = False
+_cfg: Optional[dict] = None  # рахунок, для якого тримаємо пакет
+_batch: Optional[WarmBatch] = None
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def enabled(cfg: dict) -> bool:
+    return _enabled and cfg.get("prefetch") is True
+
+
+def _interval(cfg: dict) -> float:
+    try:
+        value = float(cfg.get("prefetch_interval_seconds") or PREFETCH_INTERVAL_SECONDS)
+    except (TypeError, ValueError):
+        value = PREFETCH_INTERVAL_SECONDS
+    return max(MIN_INTERVAL_SECONDS, value)
+
+
+def enable() -> None:
+    """Дозволити префетч у цьому процесі (GUI / воркер рахунків); у --sync-only фонового потоку немає."""
+    global _enabled
+    _enabled = True
+
+
+def watch(cfg: dict, refresh_now: bool = False) -> None:
+    """Тримати теплий пакет для рахунку cfg (замінює попередній рахунок). Без prefetch: true — нічого не робить."""
+    global _cfg, _batch, _thread
+    if not enabled(cfg):
+        return
+    with _lock:
+        if _cfg is None or _cfg.get("trading_account_id") != cfg.get("trading_account_id"):
+            _batch = None
+        _cfg = dict(cfg)
+        if _thread is None or not _thread.is_alive():
+            _stop.clear()
+            _thread = threading.Thread(target=_loop, name="deal-prefetch", daemon=True)
+            _thread.start()
+    if refresh_now:
+        _wake.set()
+
+
+def take(account_id: str, from_time: datetime) -> Optional[WarmBatch]:
+    """Забрати теплий пакет для синку, якщо він покриває вікно синку (from_time не раніше початку пакета)."""
+    global _batch
+    with _lock:
+        batch, _batch = _batch, None
+    if batch is None or batch.account_id != account_id or from_time < batch.from_time:
+        return None
+    return batch
+
+
+def stop() -> None:
+    global _thread, _cfg, _batch
+    _stop.set()
+    _wake.set()
+    thread = _thread
+    if thread is not None and thread is not threading.current_thread():
+        thread.join(5.0)
+    with _lock:
+        _thread = None
+        _cfg = None
+        _batch = None
+
+
+def _loop() -> None:
+    while not _stop.is_set():
+        with _lock:
+            cfg = _cfg
+        if cfg is None:
+            return
+        _wake.wait(_interval(cfg))
+        _wake.clear()
+        if _stop.is_set():
+            return
+        try:
+            _refresh()
+        except Exception as e:  # термінал відпав тощо — наступна спроба за інтервал
+            print(f"Prefetch error: {e}")
+
+
+def _window_start(account_id: str, ledger: DealLedger, now: datetime) -> datetime:
+    """Ймовірний початок вікна наступного синку — лише з локальних даних (без pending-sync)."""
+    checkpoint = load_upload_checkpoint(account_id)
+    if checkpoint:
+        return datetime.fromisoformat(checkpoint["from_time"])
+    last_delivered = ledger.last_time(account_id)
+    if last_delivered is not None:
+        return datetime.fromtimestamp(last_delivered, timezone.utc)
+    return now - timedelta(days=DEFAULT_WINDOW_DAYS)
+
+
+def _refresh() -> None:
+    """Оновити пакет: добрати угоди після попереднього оновлення (або вибрати вікно заново)."""
+    global _batch
+    with _lock:
+        cfg = _cfg
+        previous = _batch
+    if cfg is None:
+        return
+    account_id = cfg.get("trading_account_id") or ""
+    ledger = get_ledger()
+    now = datetime.now(timezone.utc)
+    with metrics.stage("prefetch") as st:
+        from_time = _window_start(account_id, ledger, now)
+        incremental = previous is not None and previous.account_id == account_id and previous.from_time <= from_time
+        with session(
+            int(cfg.get("mt5_login") or 0),
+            cfg.get("mt5_password") or "",
+            cfg.get("mt5_server") or "",
+            mt5_path=cfg.get("mt5_path") or None,
+        ) as (ok, err):
+            if not ok:
+                st.failed = True
+                return
+            raw = get_deals(previous.to_time if incremental else from_time, now)
+        delta = prepare_batch(ledger, account_id, raw)
+        openings = opening_tickets(raw)
+        last = last_deal(raw)
+        if incremental:
+            # Пакет і далі покриває вікно попереднього оновлення; доставлені угоди відсіює журнал
+            from_time = previous.from_time
+            deals = combine(previous, delta, from_time, ledger)
+            total = previous.total + count_after(raw, previous.to_time)
+            openings = np.union1d(previous.openings, openings)
+            last = last or previous.last_deal
+        else:
+            deals = delta
+            total = len(raw)
+        # Лише відкриття угод пакета: доставлені відсіяні, набір не росте від оновлення до оновлення
+        openings = openings[np.isin(openings, deals["ticket"])]
+        st.deals = len(deals)
+    with _lock:
+        # Поки оновлювали, пакет могли забрати на синк (або змінити рахунок) — тоді цей результат застарів
+        if _batch is previous and _cfg is cfg:
+            _batch = WarmBatch(account_id, from_time, now, deals, total, openings, last)
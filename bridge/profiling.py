@@ -0,0 +1,116 @@
+"""
+Профілювання синку для звітів від користувачів (--profile, /sync-request?profile=1): без дебагера і без зміни exe.
+Час — семплювальний профайлер pyinstrument, якщо встановлений, інакше cProfile; пам'ять — tracemalloc.
+Звіти з міткою часу пишуться в profiles/ поруч зі state.json.
+"""
+import cProfile
+import io
+import pstats
+import re
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import config
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    SAMPLING_AVAILABLE = True
+except ImportError:
+    SAMPLING_AVAILABLE = False
+    SamplingProfiler = None
+
+PROFILES_DIRNAME = "profiles"
+PSTATS_TOP = 60  # рядків у текстовому звіті cProfile
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP = 30  # місць алокації у звіті пам'яті
+
+
+def profiles_dir() -> Path:
+    return config.STATE_PATH.parent / PROFILES_DIRNAME
+
+
+def report_base(name: str) -> Path:
+    """Шлях звіту без розширення: profiles/<name>-<YYYYmmdd-HHMMSS>; файли — <base>.prof, <base>.txt, <base>-memory.txt."""
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name) or "sync"
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return profiles_dir() / f"{safe}-{stamp}"
+
+
+def reports_for(base: Path) -> list[str]:
+    """Файли звіту, записані для base (для /sync-jobs і консолі)."""
+    base = Path(base)
+    if not base.parent.exists():
+        return []
+    return sorted(str(p) for p in base.parent.glob(f"{base.name}*") if p.is_file())
+
+
+def profile_call(base: Path, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, list[str]]:
+    """Виконати fn під профайлером і tracemalloc; повертає (результат fn, шляхи звітів).
+    Звіти пишуться і тоді, коли fn кидає виняток (виняток прокидається далі)."""
+    base = Path(base)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    if SAMPLING_AVAILABLE:
+        profiler = SamplingProfiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    t0 = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as e:
+        _reports_after(base, profiler, t0, was_tracing, e)
+        raise
+    return result, _reports_after(base, profiler, t0, was_tracing, None)
+
+
+def _reports_after(base: Path, profiler: Any, t0: float, was_tracing: bool, error: Any) -> list[str]:
+    elapsed = time.perf_counter() - t0
+    if SAMPLING_AVAILABLE:
+        profiler.stop()
+        _write_text(base.with_name(f"{base.name}.txt"), profiler.output_text(unicode=True, color=False))
+        _write_text(base.with_name(f"{base.name}.html"), profiler.output_html())
+    else:
+        profiler.disable()
+        profiler.dump_stats(str(base.with_name(f"{base.name}.prof")))  # для snakeviz / python -m pstats
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(PSTATS_TOP)
+        stats.sort_stats("tottime").print_stats(PSTATS_TOP // 2)
+        _write_text(base.with_name(f"{base.name}.txt"), out.getvalue())
+    _write_memory_report(base.with_name(f"{base.name}-memory.txt"), elapsed, error)
+    if not was_tracing:
+        tracemalloc.stop()
+    return reports_for(base)
+
+
+def _write_memory_report(path: Path, elapsed: float, error: Any) -> None:
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+    lines = [
+        f"elapsed: {elapsed:.3f}s",
+        f"result: {'exception ' + repr(error) if error is not None else 'ok'}",
+        f"python allocations peak: {peak / 1024 / 1024:.1f} MiB",
+        f"python allocations at end: {current / 1024 / 1024:.1f} MiB",
+        "",
+        f"Top {TRACEMALLOC_TOP} allocation sites still alive at the end:",
+    ]
+    for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KiB  {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+    _write_text(path, "\n".join(lines) + "\n")
+
+
+def _write_text(path: Path, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
@@ -0,0 +1,97 @@
+"""
+Фоновий режим без вікна (--service): для VPS поруч з MT5, де tkinter і цикл подій GUI — зайва пам'ять.
+Локальний сервер (/config, /sync-request) працює до Ctrl+C / SIGTERM; події, які GUI показує в лозі вікна,
+і вивід print пишуться в bridge.log поруч зі state.json з ротацією (SERVICE_LOG_MAX_BYTES × SERVICE_LOG_BACKUPS).
+"""
+import logging
+import signal
+import sys
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+import config
+
+SERVICE_LOG_NAME = "bridge.log"
+SERVICE_LOG_MAX_BYTES = 1_000_000
+SERVICE_LOG_BACKUPS = 3  # bridge.log.1 … bridge.log.3 — максимум ~4 МБ логів
+STOP_POLL_SECONDS = 1.0  # Event.wait з таймаутом: на Windows Ctrl+C не перериває безстрокове очікування
+
+_stop = threading.Event()
+
+
+def log_path() -> Path:
+    return config.STATE_PATH.parent / SERVICE_LOG_NAME
+
+
+def open_log(path: Optional[Path] = None) -> logging.Logger:
+    """Логер bridge.log з ротацією за розміром; повторний виклик не додає другий handler."""
+    logger = logging.getLogger("tradetrack.bridge")
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            path or log_path(),
+            maxBytes=SERVICE_LOG_MAX_BYTES,
+            backupCount=SERVICE_LOG_BACKUPS,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class LogQueue:
+    """Замінник msg_queue GUI для config_server і main: ("log", рядок) і ("status", текст, is_error) — у лог."""
+
+    def __init__(self, logger: logging.Logger) -> None:
+        self.logger = logger
+
+    def put(self, msg: tuple) -> None:
+        if msg[0] == "status":
+            is_error = msg[2] if len(msg) > 2 else False
+            self.logger.log(logging.ERROR if is_error else logging.INFO, "status: %s", msg[1])
+        else:
+            self.logger.info("%s", msg[1])
+
+
+class _LogWriter:
+    """sys.stdout/sys.stderr → лог по рядку (у exe без консолі вони None і вивід print губився б)."""
+
+    def __init__(self, logger: logging.Logger, level: int) -> None:
+        self.logger = logger
+        self.level = level
+        self._buffer = ""
+        self._lock = threading.Lock()  # print з потоків синку і сервера
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._buffer += text
+            *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                self.logger.log(self.level, "%s", line.rstrip())
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def redirect_output(logger: logging.Logger) -> None:
+    sys.stdout = _LogWriter(logger, logging.INFO)
+    sys.stderr = _LogWriter(logger, logging.ERROR)
+
+
+def request_stop(*_args: object) -> None:
+    _stop.set()
+
+
+def wait_for_stop() -> None:
+    """Блокує головний потік до Ctrl+C, SIGTERM (або SIGBREAK на Windows) чи request_stop()."""
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        sig = getattr(signal, name, None)
+        if sig is not None:
+            signal.signal(sig, request_stop)
+    while not _stop.wait(STOP_POLL_SECONDS):
+        pass
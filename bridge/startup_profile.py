@@ -0,0 +1,88 @@
+"""
+Профіль старту (--startup-profile): час кожного імпорту у форматі python -X importtime і мітки етапів запуску.
+Працює і в зібраному exe, де -X importtime недоступний: на час профілювання підміняється _find_and_load
+механізму імпорту. Лише стандартні модулі — підключається першим рядком main.py, до важких імпортів.
+"""
+import _thread
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+_bootstrap = sys.modules["_frozen_importlib"]
+_original_find_and_load = None
+_thread_id: Optional[int] = None
+_started = 0.0
+_stack: list[list] = []  # [ім'я, глибина, початок, час вкладених імпортів] незавершених імпортів
+_records: list[tuple[int, int, int, str]] = []  # (self us, cumulative us, глибина, модуль) у порядку завершення
+_marks: list[tuple[str, float]] = []
+
+
+def active() -> bool:
+    return _original_find_and_load is not None
+
+
+def in_child_process() -> bool:
+    """Процес-воркер multiprocessing (spawn успадковує sys.argv батька разом з --startup-profile).
+    Дочірній процес spawn уже імпортував multiprocessing; у головному він ще не імпортований — і не імпортується тут,
+    щоб потрапити у профіль."""
+    mp = sys.modules.get("multiprocessing")
+    return mp is not None and mp.parent_process() is not None
+
+
+def start() -> None:
+    """Почати запис імпортів головного потоку (імпорти інших потоків не рахуються, як і вкладеність між ними)."""
+    global _original_find_and_load, _thread_id, _started
+    if active():
+        return
+    _original_find_and_load = _bootstrap._find_and_load
+    _thread_id = _thread.get_ident()
+    _started = time.perf_counter()
+    _bootstrap._find_and_load = _timed_find_and_load
+
+
+def _timed_find_and_load(name, import_):
+    if _thread.get_ident() != _thread_id:
+        return _original_find_and_load(name, import_)
+    frame = [name, len(_stack), time.perf_counter(), 0.0]
+    _stack.append(frame)
+    try:
+        return _original_find_and_load(name, import_)
+    finally:
+        _stack.pop()
+        cumulative = time.perf_counter() - frame[2]
+        if _stack:
+            _stack[-1][3] += cumulative
+        _records.append((int((cumulative - frame[3]) * 1e6), int(cumulative * 1e6), frame[1], name))
+
+
+def mark(label: str) -> None:
+    """Мітка етапу запуску (час від start())."""
+    if active():
+        _marks.append((label, time.perf_counter()))
+
+
+def finish(path: Path) -> Optional[Path]:
+    """Зупинити запис і записати звіт у path (.txt); None — профілювання не було увімкнене."""
+    global _original_find_and_load
+    if not active():
+        return None
+    _bootstrap._find_and_load = _original_find_and_load
+    _original_find_and_load = None
+    ended = time.perf_counter()
+    top_level = sum(cumulative for _, cumulative, depth, _ in _records if depth == 0)
+    lines = [f"# Startup profile ({len(_records)} modules imported, {top_level / 1000:.1f} ms in imports)"]
+    lines += [f"# {label}: {(at - _started) * 1000:.1f} ms" for label, at in _marks]
+    lines.append(f"# report: {(ended - _started) * 1000:.1f} ms")
+    lines.append("# Imports done before main.py (interpreter start, site) are not listed: python -X importtime main.py")
+    lines.append("import time: self [us] | cumulative | imported package")
+    lines += [
+        f"import time: {own:>9} | {cumulative:>10} | {'  ' * depth}{name}"
+        for own, cumulative, depth, name in _records
+    ]
+    path = Path(path).with_suffix(".txt")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    _records.clear()
+    _marks.clear()
+    return path
@@ -0,0 +1,173 @@
+"""
+Фонові задачі синку: /sync-request лише ставить задачу, run_sync виконується у воркер-потоці.
+Стан задачі (етап, лічильники угод, результат) віддається через /sync-jobs/<id>.
+Паралельні запити одного рахунку зливаються в одну задачу (single-flight); щойно завершений
+успішний синк відповідає на нові запити протягом вікна debounce без звернення до MT5.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import profiling
+
+SHUTDOWN_MESSAGE = "Bridge is shutting down"
+MAX_KEPT_JOBS = 50  # скільки завершених задач пам'ятати для /sync-jobs/<id>
+SYNC_DEBOUNCE_SECONDS = 2.0  # config.json: sync_debounce_seconds
+
+
+class SyncJob:
+    """Одна задача синку. update() викликається з run_sync як progress(stage, **counts).
+    profile=True — синк під профайлером, звіти в profiles/ (profile_reports у to_dict)."""
+
+    def __init__(self, cfg: dict, profile: bool = False) -> None:
+        self.id = uuid.uuid4().hex
+        self.cfg = cfg
+        self.profile: Optional[str] = None
+        if profile:
+            self.profile = str(profiling.report_base(f"sync-{cfg.get('trading_account_id') or ''}-{self.id[:8]}"))
+        self.stage = "queued"
+        self.counts: dict[str, int] = {}
+        self.result: Optional[tuple[bool, str, int]] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def update(self, stage: str, **counts: int) -> None:
+        with self._lock:
+            self.stage = stage
+            self.counts.update(counts)
+
+    def finish(self, result: tuple[bool, str, int], stage: Optional[str] = None) -> None:
+        with self._lock:
+            self.result = result
+            self.stage = stage or ("done" if result[0] else "failed")
+            self.finished_at = time.time()
+        self._done.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Задача так і не запустилась: bridge зупинили, поки вона чекала в черзі."""
+        return self.done and self.stage == "cancelled"
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            result = None
+            if self.result is not None:
+                success, message, synced = self.result
+                result = {"ok": success, "message": message, "synced": synced}
+            data = {
+                "id": self.id,
+                "stage": self.stage,
+                "counts": dict(self.counts),
+                "done": self._done.is_set(),
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "result": result,
+            }
+        if self.profile:
+            data["profile_reports"] = profiling.reports_for(self.profile) if data["done"] else []
+        return data
+
+
+class SyncJobRunner:
+    """Черга задач і реєстр останніх задач. За замовчуванням один воркер (MT5 — один термінал на процес);
+    max_workers > 1 — лише коли sync_runner сам розводить рахунки по процесах (account_workers)."""
+
+    def __init__(
+        self,
+        sync_runner: Callable[..., tuple[bool, str, int]],
+        on_done: Optional[Callable[[SyncJob], None]] = None,
+        max_workers: int = 1,
+    ) -> None:
+        self.sync_runner = sync_runner
+        self.on_done = on_done
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync-job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, SyncJob] = {}
+        self._latest: dict[str, SyncJob] = {}  # trading_account_id → остання задача
+        self._queued: dict[str, Future] = {}  # id → future задач, які ще не почали виконуватись
+        self._closed = False
+
+    def submit_or_attach(
+        self,
+        cfg: dict,
+        debounce: float = SYNC_DEBOUNCE_SECONDS,
+        profile: bool = False,
+    ) -> tuple[SyncJob, bool]:
+        """Повертає (job, attached). attached=True — запит приєднано до задачі, що виконується,
+        або до успішної, яка завершилась не пізніше ніж debounce секунд тому.
+        Запит з profile=True приєднується лише до профільованої задачі, що ще виконується."""
+        account_id = cfg.get("trading_account_id") or ""
+        with self._lock:
+            latest = self._latest.get(account_id)
+            if latest is not None and (not profile or latest.profile):
+                if not latest.done:
+                    return latest, True
+                success = latest.result is not None and latest.result[0]
+                recent = latest.finished_at is not None and time.time() - latest.finished_at <= debounce
+                if success and recent and not profile:
+                    return latest, True
+            job = self._submit_locked(cfg, profile)
+            self._latest[account_id] = job
+            return job, False
+
+    def submit(self, cfg: dict, profile: bool = False) -> SyncJob:
+        with self._lock:
+            return self._submit_locked(cfg, profile)
+
+    def _submit_locked(self, cfg: dict, profile: bool = False) -> SyncJob:
+        job = SyncJob(cfg, profile=profile)
+        self._jobs[job.id] = job
+        self._forget_old()
+        if self._closed:
+            # Запит прийшов під час зупинки — відповідь одразу, а не вічне очікування ?wait=1
+            job.finish((False, SHUTDOWN_MESSAGE, 0), stage="cancelled")
+            return job
+        self._queued[job.id] = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        """Скасувати задачі з черги (поточна дозавершується). Скасовані завершуються з помилкою SHUTDOWN_MESSAGE,
+        тож клієнти, що чекають їх у /sync-request?wait=1, отримують відповідь, а не висять."""
+        with self._lock:
+            self._closed = True
+            queued = [(self._jobs.get(job_id), future) for job_id, future in self._queued.items()]
+            self._queued.clear()
+        for job, future in queued:
+            if future.cancel() and job is not None:
+                job.finish((False, SHUTDOWN_MESSAGE, 0), stage="cancelled")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget_old(self) -> None:
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in sorted(finished, key=lambda j: j.created_at)[:max(0, len(self._jobs) - MAX_KEPT_JOBS)]:
+            del self._jobs[job.id]
+
+    def _run(self, job: SyncJob) -> None:
+        with self._lock:
+            self._queued.pop(job.id, None)
+        job.update("started")
+        try:
+            if job.profile:
+                result = self.sync_runner(job.cfg, progress=job.update, profile=job.profile)
+            else:
+                result = self.sync_runner(job.cfg, progress=job.update)
+        except Exception as e:
+            result = (False, str(e), 0)
+        job.finish(result)
+        if self.on_done is not None:
+            self.on_done(job)
@@ -0,0 +1,27 @@
+"""Перехід на воркери кількох рахунків: головний процес відпускає термінал до того, як воркер до нього підключиться."""
+import fake_mt5
+import mt5_sync
+from account_workers import AccountDispatcher
+
+
+def test_parent_session_closed_before_worker(monkeypatch):
+    mt5_sync.use_backend(fake_mt5)
+    try:
+        ok, _ = mt5_sync.ensure_connected(1, "pw", "Fake-Server")
+        assert ok and fake_mt5._initialized
+
+        seen = []
+
+        class Worker:
+            def run(self, cfg, progress, profile=None):
+                # Момент, коли воркер логінився б у термінал
+                seen.append((mt5_sync._session, fake_mt5._initialized))
+                return True, "ok", 0
+
+        dispatcher = AccountDispatcher(lambda cfg, progress: (True, "local", 0))
+        monkeypatch.setattr(AccountDispatcher, "multi_account", staticmethod(lambda: True))
+        monkeypatch.setattr(dispatcher, "worker_for", lambda cfg: Worker())
+        assert dispatcher.run_sync({"trading_account_id": "a"}) == (True, "ok", 0)
+        assert seen == [(None, False)]
+    finally:
+        mt5_sync.use_backend(None)
@@ -0,0 +1,51 @@
+"""Перевірка змін перед синком (change_probe): та сама кількість угод у вікні ще не означає «нових угод немає»."""
+import json
+
+import pytest
+
+import config
+import fake_mt5
+import main
+import mt5_sync
+from mock_api import run_mock_api
+
+
+@pytest.fixture
+def bridge(tmp_path, monkeypatch):
+    """fake_mt5 + mock API, config.json/state.json/ledger.db у tmp_path; повертає cfg рахунку."""
+    monkeypatch.setattr(config, "CONFIG_PATH", tmp_path / "config.json")
+    monkeypatch.setattr(config, "STATE_PATH", tmp_path / "state.json")
+    fake_mt5.configure(deals=200, days=1)
+    mt5_sync.use_backend(fake_mt5)
+    server = run_mock_api()
+    cfg = {
+        "api_base_url": server.url,
+        "sync_token": "t",
+        "trading_account_id": "probe",
+        "mt5_login": 1,
+        "mt5_password": "p",
+        "mt5_server": "s",
+    }
+    (tmp_path / "config.json").write_text(json.dumps(cfg), encoding="utf-8")
+    yield cfg
+    server.shutdown()
+    mt5_sync.shutdown()
+    mt5_sync.use_backend(None)
+    fake_mt5.configure(deals=10000, days=30)
+
+
+def test_unchanged_terminal_short_circuits(bridge):
+    ok, _, synced = main.run_sync(bridge)
+    assert ok and synced > 0
+    ok, _, synced = main.run_sync(bridge)
+    assert ok and synced == 0
+    assert config.load_account_state("probe")["probe"]["last_ticket"] == fake_mt5._deals[-1].ticket
+
+
+def test_replaced_deal_with_same_count_is_synced(bridge):
+    assert main.run_sync(bridge)[0]
+    # Брокер прибрав останню угоду вікна, і прийшла нова: history_deals_total той самий
+    fake_mt5.add_deals(1)
+    del fake_mt5._deals[-2], fake_mt5._times[-2]
+    ok, _, synced = main.run_sync(bridge)
+    assert ok and synced == 1
@@ -0,0 +1,37 @@
+"""Lock state.json між процесами: завислий власник lock дає помилку після дедлайну, а не вічне очікування."""
+import threading
+import time
+
+import pytest
+
+import config
+
+
+def test_lock_times_out_while_held(tmp_path):
+    path = tmp_path / "state.json"
+    with config._file_lock(path):
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            # Окремий open — окремий опис файлу: конфліктує з утриманим lock, як інший процес
+            with config._file_lock(path, timeout=0.3):
+                pass
+        assert 0.3 <= time.monotonic() - started < 2.0
+
+
+def test_lock_acquired_after_release(tmp_path):
+    path = tmp_path / "state.json"
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with config._file_lock(path):
+            acquired.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    assert acquired.wait(5)
+    threading.Timer(0.2, release.set).start()
+    with config._file_lock(path, timeout=5):
+        pass
+    thread.join(5)
@@ -0,0 +1,147 @@
+"""Агрегація позицій з повної історії терміналу: угоди позиції поза вікном синку не губляться,
+а історія всього рахунку не вибирається."""
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import deal_arrays
+import fake_mt5
+import main
+import mt5_sync
+
+CFG = {"mt5_login": 1, "mt5_password": "p", "mt5_server": "s"}
+TO_TIME = datetime(2030, 1, 1, tzinfo=timezone.utc)
+T0 = 1_700_000_000
+
+
+def _deal(ticket, time, entry, volume, price, profit=0.0, position=1, deal_type=fake_mt5.DEAL_TYPE_BUY):
+    """Ордер угоди — її тікет; як у MT5, ідентифікатор позиції — ордер угоди відкриття."""
+    if entry == fake_mt5.DEAL_ENTRY_OUT:
+        deal_type = 1 - deal_type
+    time += T0
+    return fake_mt5.TradeDeal(
+        ticket, ticket, time, time * 1000, deal_type, entry, 0, position, 0,
+        volume, price, 0.0, 0.0, profit, 0.0, "EURUSD", "", "",
+    )
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    """fake_mt5 з заданою історією; calls — аргументи кожного history_deals_get."""
+    calls = []
+    original = fake_mt5.history_deals_get
+
+    def counted(*args, **kwargs):
+        calls.append((args, kwargs))
+        return original(*args, **kwargs)
+
+    def load(deals):
+        fake_mt5._deals = sorted(deals, key=lambda d: d.time)
+        fake_mt5._times = [d.time for d in fake_mt5._deals]
+        fake_mt5._by_position = None
+        return calls
+
+    monkeypatch.setattr(fake_mt5, "history_deals_get", counted)
+    mt5_sync.use_backend(fake_mt5)
+    yield load
+    mt5_sync.use_backend(None)
+    fake_mt5._deals = fake_mt5._times = fake_mt5._by_position = None
+
+
+def _window(deals, after_ticket=0):
+    """Угоди вікна синку (API) і тікети угод відкриття з вибірки MT5, як у run_sync."""
+    raw = deal_arrays.from_mt5(tuple(deals))
+    api = deal_arrays.to_api(raw)
+    return api[api["ticket"] > after_ticket], deal_arrays.opening_tickets(raw)
+
+
+def _position(window):
+    (rows, anchors), err = main._aggregate_positions(CFG, *window, TO_TIME)
+    assert err == ""
+    assert len(rows) == 1
+    return rows[0], anchors
+
+
+def test_scale_in_delivered_earlier(terminal):
+    history = [
+        _deal(1, 1000, fake_mt5.DEAL_ENTRY_IN, 1.0, 1.0),
+        _deal(2, 2000, fake_mt5.DEAL_ENTRY_IN, 1.0, 1.4),
+        _deal(3, 3000, fake_mt5.DEAL_ENTRY_OUT, 2.0, 1.5, profit=50.0),
+    ]
+    terminal(history)
+    # Перша угода входу доставлена попереднім синком — у вікні лише доливка і закриття
+    row, anchors = _position(_window(history[1:]))
+    assert row["volume"] == pytest.approx(2.0)
+    assert row["closedVolume"] == pytest.approx(2.0)
+    assert row["entryPrice"] == pytest.approx(1.2)
+    assert row["openTime"] == T0 + 1000
+    assert row["closed"]
+    assert anchors.tolist() == [3]
+
+
+def test_partial_close_before_window(terminal):
+    history = [
+        _deal(1, 1000, fake_mt5.DEAL_ENTRY_IN, 2.0, 1.0),
+        _deal(2, 1500, fake_mt5.DEAL_ENTRY_OUT, 1.0, 1.1, profit=10.0),
+        _deal(3, 3000, fake_mt5.DEAL_ENTRY_OUT, 1.0, 1.2, profit=20.0),
+    ]
+    terminal(history)
+    row, _ = _position(_window(history[2:]))
+    assert row["volume"] == pytest.approx(2.0)
+    assert row["closedVolume"] == pytest.approx(2.0)
+    assert row["exitPrice"] == pytest.approx(1.15)
+    assert row["profit"] == pytest.approx(30.0)
+    assert row["closeTime"] == T0 + 3000
+    assert row["closed"]
+
+
+def test_window_resumed_after_checkpoint(terminal):
+    history = [
+        _deal(1, 1000, fake_mt5.DEAL_ENTRY_IN, 1.0, 1.0),
+        _deal(2, 2000, fake_mt5.DEAL_ENTRY_IN, 1.0, 1.4),
+        _deal(3, 3000, fake_mt5.DEAL_ENTRY_OUT, 1.0, 1.5, profit=30.0),
+        _deal(4, 4000, fake_mt5.DEAL_ENTRY_OUT, 1.0, 1.6, profit=40.0),
+    ]
+    terminal(history)
+    # Чекпоінт відвантаження: тікети до 2 включно вже підтверджені сервером
+    row, _ = _position(_window(history, after_ticket=2))
+    assert row["volume"] == pytest.approx(2.0)
+    assert row["entryPrice"] == pytest.approx(1.2)
+    assert row["exitPrice"] == pytest.approx(1.55)
+    assert row["profit"] == pytest.approx(70.0)
+    assert row["openTime"] == T0 + 1000
+
+
+def _pairs(count):
+    """count позицій: вхід (відкриття) і вихід, позиція — тікет угоди входу."""
+    deals = []
+    for i in range(count):
+        ticket = 10 + 2 * i
+        deals.append(_deal(ticket, 1000 + 2 * i, fake_mt5.DEAL_ENTRY_IN, 1.0, 1.0, position=ticket))
+        deals.append(_deal(ticket + 1, 1001 + 2 * i, fake_mt5.DEAL_ENTRY_OUT, 1.0, 1.1, profit=1.0, position=ticket))
+    return deals
+
+
+def test_opened_in_window_needs_no_history(terminal):
+    history = _pairs(20)
+    calls = terminal(history)
+    (rows, _), err = main._aggregate_positions(CFG, *_window(history), TO_TIME)
+    assert err == ""
+    assert len(rows) == 20
+    assert np.all(rows["closed"])
+    assert calls == []
+
+
+def test_history_fetched_per_position_not_from_account_start(terminal):
+    history = _pairs(20)
+    calls = terminal(history)
+    # У вікні лише виходи: входи доставлені раніше, позиції добираються з терміналу
+    (rows, _), err = main._aggregate_positions(CFG, *_window(history[1::2]), TO_TIME)
+    assert err == ""
+    assert len(rows) == 20
+    assert np.all(rows["closed"])
+    assert rows["volume"] == pytest.approx(np.ones(20))
+    # Жодної вибірки за датами (історії рахунку від початку) — лише history_deals_get(position=...)
+    assert len(calls) == 20
+    assert all(args == () and set(kwargs) == {"position"} for args, kwargs in calls)
@@ -0,0 +1,22 @@
+"""--startup-profile профілює лише головний процес: воркери рахунків (spawn) успадковують sys.argv, але не хук імпорту."""
+import multiprocessing
+import sys
+
+
+def _child(result) -> None:
+    import main  # noqa: F401 — перевірка --startup-profile на рівні модуля
+    import startup_profile
+
+    result.put((sys.argv, startup_profile.active()))
+
+
+def test_spawned_worker_does_not_profile(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["main.py", "--startup-profile"])
+    ctx = multiprocessing.get_context("spawn")
+    result = ctx.Queue()
+    process = ctx.Process(target=_child, args=(result,))
+    process.start()
+    argv, active = result.get(timeout=60)
+    process.join(10)
+    assert "--startup-profile" in argv
+    assert not active
@@ -0,0 +1,25 @@
+"""Кеш специфікацій символів: разовий збій symbol_info не ховає символ до кінця сесії."""
+import fake_mt5
+import mt5_sync
+
+
+def test_failed_lookup_is_not_cached(monkeypatch):
+    calls = []
+    original = fake_mt5.symbol_info
+
+    def flaky(symbol):
+        calls.append(symbol)
+        return None if len(calls) == 1 else original(symbol)
+
+    monkeypatch.setattr(fake_mt5, "symbol_info", flaky)
+    mt5_sync.use_backend(fake_mt5)
+    fake_mt5.initialize()
+    try:
+        assert mt5_sync.get_symbol_info(["EURUSD"]) == {}
+        info = mt5_sync.get_symbol_info(["EURUSD"])
+        assert info["EURUSD"]["digits"] == 5
+        # Успішна специфікація кешується: повторний запит без виклику терміналу
+        assert mt5_sync.get_symbol_info(["EURUSD"]) == info
+        assert calls == ["EURUSD", "EURUSD"]
+    finally:
+        mt5_sync.use_backend(None)
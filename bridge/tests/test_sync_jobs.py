@@ -0,0 +1,83 @@
+"""Зупинка bridge, поки синк чекає в черзі: клієнт /sync-request?wait=1 отримує відповідь, а не висить."""
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import config
+import config_server
+from sync_jobs import SHUTDOWN_MESSAGE, SyncJobRunner
+
+
+def _blocking_runner():
+    started = threading.Event()
+    release = threading.Event()
+
+    def sync_runner(cfg, progress):
+        started.set()
+        release.wait(10)
+        return True, "ok", 0
+
+    return sync_runner, started, release
+
+
+def test_shutdown_finishes_queued_jobs():
+    sync_runner, started, release = _blocking_runner()
+    runner = SyncJobRunner(sync_runner)
+    running = runner.submit({"trading_account_id": "a"})
+    assert started.wait(5)
+    queued = runner.submit({"trading_account_id": "b"})
+    runner.shutdown()
+    assert queued.wait(5)
+    assert queued.cancelled
+    assert queued.result == (False, SHUTDOWN_MESSAGE, 0)
+    # Поточний синк дозавершується як звичайно
+    release.set()
+    assert running.wait(5)
+    assert running.result == (True, "ok", 0)
+    late = runner.submit({"trading_account_id": "c"})
+    assert late.cancelled
+
+
+def test_stop_server_answers_waiting_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CONFIG_PATH", tmp_path / "config.json")
+    monkeypatch.setattr(config, "STATE_PATH", tmp_path / "state.json")
+    monkeypatch.setattr(config_server, "CONFIG_SERVER_PORT", 0)
+    (tmp_path / "config.json").write_text(json.dumps({
+        "api_base_url": "http://127.0.0.1:9", "sync_token": "t", "trading_account_id": "a",
+        "mt5_login": 1, "mt5_password": "p", "mt5_server": "s",
+        "accounts": {
+            "a": {"trading_account_id": "a", "mt5_login": 1, "mt5_password": "p", "mt5_server": "s"},
+            "b": {"trading_account_id": "b", "mt5_login": 2, "mt5_password": "p", "mt5_server": "s"},
+        },
+    }), encoding="utf-8")
+    sync_runner, started, release = _blocking_runner()
+    server = config_server.run_bridge_server_forever(sync_runner, lambda: None, None)
+    url = f"http://127.0.0.1:{server.server_address[1]}/sync-request?wait=1&trading_account_id="
+    responses = {}
+
+    def request(account_id):
+        req = urllib.request.Request(url + account_id, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=10) as r:
+                responses[account_id] = (r.status, json.loads(r.read()))
+        except urllib.error.HTTPError as e:
+            responses[account_id] = (e.code, json.loads(e.read()))
+
+    clients = [threading.Thread(target=request, args=(account_id,)) for account_id in ("a", "b")]
+    clients[0].start()
+    assert started.wait(5)
+    clients[1].start()
+    for _ in range(100):
+        jobs = config_server.BridgeHandler.sync_jobs
+        if len(jobs._jobs) == 2:
+            break
+        threading.Event().wait(0.05)
+    config_server.stop_bridge_server(server)
+    clients[1].join(5)
+    assert not clients[1].is_alive()
+    assert responses["b"][0] == 503
+    assert responses["b"][1]["error"] == SHUTDOWN_MESSAGE
+    release.set()
+    clients[0].join(5)
+    assert responses["a"][0] == 200
@@ -0,0 +1,228 @@
+"""
+Тіло POST /api/mt5/sync/deals як потік байтів: генерується шматками з колонок угод
+(і за потреби стискається на льоту), тож у пам'яті ніколи немає всього тіла чи списку dict.
+Формати (Content-Type): json — масив об'єктів; columns — JSON з масивом на кожне поле, словником символів
+і direction 0/1; msgpack — те саме колонкове тіло в MessagePack (потрібен пакет msgpack).
+Агреговані позиції (positions.py), якщо є, їдуть у тому ж тілі полем "positions" у форматі угод;
+специфікації символів тіла (mt5_sync.get_symbol_info) — полем "symbol_info": {символ: {...}}.
+"""
+import json
+from typing import Iterator, Optional
+
+import numpy as np
+
+from deal_arrays import RECORD_FIELDS, to_records
+from http_client import compressor
+from positions import record_columns as position_columns_of, to_records as position_records
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+STREAM_CHUNK_ROWS = 1000  # угод на один шматок JSON
+
+FORMAT_JSON = "json"
+FORMAT_COLUMNS = "columns"
+FORMAT_MSGPACK = "msgpack"
+CONTENT_TYPES = {
+    FORMAT_JSON: "application/json",
+    FORMAT_COLUMNS: "application/vnd.tradetrack.deals-columns+json",
+    FORMAT_MSGPACK: "application/vnd.tradetrack.deals-columns+msgpack",
+}
+
+
+def supported_formats() -> tuple[str, ...]:
+    """Колонкові формати, які bridge може надіслати, у порядку переваги."""
+    return (FORMAT_MSGPACK, FORMAT_COLUMNS) if MSGPACK_AVAILABLE else (FORMAT_COLUMNS,)
+
+
+def choose_format(cfg: dict, pending: Optional[dict]) -> str:
+    """config.json upload_format: auto (за замовчуванням) | json | columns | msgpack.
+    auto — перший з supported_formats(), який сервер оголосив у pending-sync (accept_formats); інакше json."""
+    mode = str(cfg.get("upload_format") or "auto").strip().lower()
+    if mode == "auto":
+        offered = pending.get("accept_formats") if isinstance(pending, dict) else None
+        if not isinstance(offered, list):
+            return FORMAT_JSON
+        return next((fmt for fmt in supported_formats() if fmt in offered), FORMAT_JSON)
+    if mode == FORMAT_MSGPACK and not MSGPACK_AVAILABLE:
+        return FORMAT_COLUMNS
+    return mode if mode in CONTENT_TYPES else FORMAT_JSON
+
+
+def deals_body(
+    wire_format: str,
+    trading_account_id: str,
+    deals: np.ndarray,
+    content_encoding: Optional[str] = None,
+    positions: Optional[np.ndarray] = None,
+    symbol_info: Optional[dict] = None,
+) -> "DealsBody":
+    body_class = {FORMAT_COLUMNS: DealsColumnsBody, FORMAT_MSGPACK: DealsMsgpackBody}.get(wire_format, DealsJsonBody)
+    return body_class(
+        trading_account_id, deals, content_encoding=content_encoding, positions=positions, symbol_info=symbol_info,
+    )
+
+
+def _body_symbol_info(symbol_info: Optional[dict], deals: np.ndarray, positions: Optional[np.ndarray]) -> Optional[dict]:
+    """Специфікації лише тих символів, що є в угодах і позиціях тіла."""
+    if symbol_info is None:
+        return None
+    names = set(deals["symbol"].tolist())
+    if positions is not None:
+        names.update(positions["symbol"].tolist())
+    return {name: symbol_info[name] for name in sorted(names) if name in symbol_info}
+
+
+def _columns(deals: np.ndarray, positions: Optional[np.ndarray]) -> tuple[list[str], dict, Optional[dict]]:
+    """Поля RECORD_FIELDS угод і поля позицій колонками; symbol — коди у спільному словнику symbols."""
+    names = deals["symbol"].astype(str)
+    if positions is not None:
+        names = np.concatenate([names, positions["symbol"].astype(str)])
+    symbols, codes = np.unique(names, return_inverse=True)
+    deal_codes = codes[:len(deals)]
+    columns = {name: deal_codes if name == "symbol" else deals[name] for name in RECORD_FIELDS}
+    position_columns = None
+    if positions is not None:
+        position_columns = position_columns_of(positions, symbol_codes=codes[len(deals):])
+    return symbols.tolist(), columns, position_columns
+
+
+class DealsBody:
+    """Ітератор байтів тіла для chunked transfer; підкласи генерують некомпресоване тіло в _chunks().
+    Кожен виклик __iter__ генерує тіло заново, тож повтор запиту (Retry у сесії) надсилає його повністю."""
+
+    content_type = CONTENT_TYPES[FORMAT_JSON]
+
+    def __init__(
+        self,
+        trading_account_id: str,
+        deals: np.ndarray,
+        content_encoding: Optional[str] = None,
+        chunk_rows: int = STREAM_CHUNK_ROWS,
+        positions: Optional[np.ndarray] = None,
+        symbol_info: Optional[dict] = None,
+    ) -> None:
+        self.trading_account_id = trading_account_id
+        self.deals = deals
+        self.positions = positions  # None — тіло без поля "positions"
+        self.symbol_info = _body_symbol_info(symbol_info, deals, positions)  # None — без поля "symbol_info"
+        self.content_encoding = content_encoding
+        self.chunk_rows = max(1, chunk_rows)
+        self.bytes_sent = 0  # байтів тіла (після стиснення) за останню ітерацію — для метрик
+
+    def _chunks(self) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.bytes_sent = 0
+        for chunk in self._encoded_chunks():
+            self.bytes_sent += len(chunk)
+            yield chunk
+
+    def _encoded_chunks(self) -> Iterator[bytes]:
+        comp = compressor(self.content_encoding)
+        if comp is None:
+            yield from self._chunks()
+            return
+        for chunk in self._chunks():
+            out = comp.compress(chunk)
+            if out:
+                yield out
+        tail = comp.flush()
+        if tail:
+            yield tail
+
+    def to_bytes(self) -> bytes:
+        """Все тіло одним буфером (коли сервер не приймає chunked transfer)."""
+        return b"".join(self)
+
+
+class DealsJsonBody(DealsBody):
+    """{"trading_account_id": ..., "deals": [{...}, ...]} — по об'єкту на угоду."""
+
+    def _chunks(self) -> Iterator[bytes]:
+        yield b'{"trading_account_id":' + json.dumps(self.trading_account_id).encode("utf-8") + b',"deals":['
+        separator = b""
+        for start in range(0, len(self.deals), self.chunk_rows):
+            records = to_records(self.deals[start:start + self.chunk_rows])
+            # Масив без дужок: шматки з'єднуються комами в один JSON-масив
+            part = json.dumps(records, separators=(",", ":"), allow_nan=False)[1:-1]
+            yield separator + part.encode("utf-8")
+            separator = b","
+        yield b"]"
+        if self.positions is not None:
+            records = position_records(self.positions)
+            yield b',"positions":' + json.dumps(records, separators=(",", ":"), allow_nan=False).encode("utf-8")
+        if self.symbol_info is not None:
+            yield b',"symbol_info":' + json.dumps(self.symbol_info, separators=(",", ":")).encode("utf-8")
+        yield b"}"
+
+
+class DealsColumnsBody(DealsBody):
+    """{"trading_account_id", "format": "columns", "count", "symbols": [...], "deals": {"ticket": [...], ...}}:
+    ключі не повторюються для кожної угоди, symbol — індекс у symbols, direction — 0 (BUY) / 1 (SELL).
+    З позиціями — ще "position_count" і "positions": {"positionId": [...], ...} зі спільним словником symbols."""
+
+    content_type = CONTENT_TYPES[FORMAT_COLUMNS]
+
+    def _chunks(self) -> Iterator[bytes]:
+        symbols, columns, position_columns = _columns(self.deals, self.positions)
+        head = {
+            "trading_account_id": self.trading_account_id,
+            "format": FORMAT_COLUMNS,
+            "count": len(self.deals),
+            "symbols": symbols,
+        }
+        if position_columns is not None:
+            head["position_count"] = len(self.positions)
+        if self.symbol_info is not None:
+            head["symbol_info"] = self.symbol_info
+        # Без закривальної дужки: далі дописується "deals"
+        yield json.dumps(head, separators=(",", ":"))[:-1].encode("utf-8") + b',"deals":{'
+        yield from self._column_chunks({name: column.tolist() for name, column in columns.items()})
+        if position_columns is not None:
+            yield b'},"positions":{'
+            yield from self._column_chunks(position_columns)
+        yield b"}}"
+
+    @staticmethod
+    def _column_chunks(columns: dict[str, list]) -> Iterator[bytes]:
+        separator = b""
+        for name, values in columns.items():
+            # Пакет обмежений upload_batch_size — колонка за раз
+            yield separator + json.dumps(name).encode("utf-8") + b":" + json.dumps(
+                values, separators=(",", ":"), allow_nan=False,
+            ).encode("utf-8")
+            separator = b","
+
+
+class DealsMsgpackBody(DealsBody):
+    """Колонкове тіло (як DealsColumnsBody) у MessagePack: числа бінарні (float64 замість десяткового тексту)."""
+
+    content_type = CONTENT_TYPES[FORMAT_MSGPACK]
+
+    def _chunks(self) -> Iterator[bytes]:
+        packer = msgpack.Packer(use_bin_type=True)
+        symbols, columns, position_columns = _columns(self.deals, self.positions)
+        head = [
+            "trading_account_id", self.trading_account_id,
+            "format", FORMAT_COLUMNS,
+            "count", len(self.deals),
+            "symbols", symbols,
+        ]
+        if position_columns is not None:
+            head += ["position_count", len(self.positions)]
+        if self.symbol_info is not None:
+            head += ["symbol_info", self.symbol_info]
+        yield packer.pack_map_header(len(head) // 2 + 1 + (position_columns is not None)) + b"".join(
+            packer.pack(v) for v in head
+        )
+        yield packer.pack("deals") + packer.pack_map_header(len(columns))
+        for name, column in columns.items():
+            yield packer.pack(name) + packer.pack(column.tolist())
+        if position_columns is not None:
+            yield packer.pack("positions") + packer.pack(position_columns)